@@ -0,0 +1,213 @@
+try:
+    import re
+    from bisect import bisect_left, insort
+    from collections import namedtuple
+    from threading import Lock
+    from time import monotonic
+
+    from flask import current_app
+
+    from main import db
+    from models.band import Band
+    from models.table_version import TableVersion
+    from models.venue import Venue
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# One suggestion, type is band or venue
+Suggestion = namedtuple("Suggestion", ["type", "id", "name"])
+
+sources = {
+    "band" : (Band, Band.band_name),
+    "venue" : (Venue, Venue.venue_name),
+}
+
+
+def normalise(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def keys(name):
+    """Returns the name from each word on, so a prefix can match
+    the start of any word, "the old bar" -> "old bar" -> "bar"
+    """
+    words = normalise(name).split(" ")
+
+    return [" ".join(words[start:]) for start in range(len(words)) \
+            if words[start]]
+
+
+# Prefix index over band and venue names for type-ahead
+# a sorted list of (key, type, id, name), so a prefix lookup is a
+# binary search then a walk over the matching run, with no query
+# built on first use, then kept up to date in place by the band and
+# venue controllers through update and remove
+# lookups and changes hold the lock, both only touch a few entries
+# writes made by other workers are picked up by rebuilding when
+# TableVersion shows BANDS or VENUES changed, checked at most every
+# AUTOCOMPLETE_REFRESH_SECONDS
+# one thread rebuilds outside the lock while lookups carry on, and
+# changes made meanwhile are applied again to the rebuilt list
+class AutocompleteIndex:
+    tables = ("BANDS", "VENUES")
+
+    def __init__(self):
+        self.entries = None
+        self.names = {}
+        self.versions = None
+        self.checked = 0
+        # changes made during a rebuild, None when not rebuilding
+        self.replay = None
+        self._lock = Lock()
+        self._build_lock = Lock()
+
+    def table_versions(self):
+        rows = db.session.execute(
+            db.select(TableVersion.table_name, TableVersion.version)\
+                .where(TableVersion.table_name.in_(self.tables))).all()
+
+        return sorted(tuple(row) for row in rows)
+
+    def refresh(self):
+        """Builds the index on first use and rebuilds it when
+        another worker has changed bands or venues
+        """
+        interval = current_app.config["AUTOCOMPLETE_REFRESH_SECONDS"]
+        if self.entries is not None and \
+                monotonic() - self.checked < interval:
+            return
+
+        # only the first build is waited for
+        if not self._build_lock.acquire(blocking=self.entries is None):
+            return
+        try:
+            if self.entries is not None and \
+                    monotonic() - self.checked < interval:
+                return
+
+            versions = self.table_versions()
+            if versions != self.versions:
+                with self._lock:
+                    self.replay = []
+
+                entries = []
+                names = {}
+                for kind, (model, name) in sources.items():
+                    for id, title in db.session.execute(
+                            db.select(model.id, name)):
+                        names[(kind, id)] = title
+                        entries.extend((key, kind, id, title) \
+                                       for key in keys(title))
+                entries.sort()
+
+                with self._lock:
+                    self.entries = entries
+                    self.names = names
+                    self.versions = versions
+                    for change in self.replay:
+                        change()
+                    self.replay = None
+
+            self.checked = monotonic()
+        finally:
+            self._build_lock.release()
+
+    def suggest(self, prefix, limit):
+        """Returns up to limit bands and venues with a word starting
+        with prefix, in alphabetical order of the matched words
+        """
+        self.refresh()
+
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+
+        suggestions = []
+        seen = set()
+        with self._lock:
+            entries = self.entries
+            position = bisect_left(entries, (prefix,))
+            while position < len(entries) and len(suggestions) < limit:
+                key, kind, id, name = entries[position]
+                if not key.startswith(prefix):
+                    break
+                if (kind, id) not in seen:
+                    seen.add((kind, id))
+                    suggestions.append(Suggestion(kind, id, name))
+                position += 1
+
+        return suggestions
+
+    def expire(self):
+        """Checks for changes on the next lookup, after bulk writes
+        too large to apply one at a time
+        """
+        self.checked = 0
+
+    def update(self, kind, id, name):
+        """Adds or renames a band or venue, once it is committed"""
+
+        def change():
+            self._remove(kind, id)
+            self.names[(kind, id)] = name
+            for key in keys(name):
+                insort(self.entries, (key, kind, id, name))
+
+        self.apply(kind, change)
+
+    def remove(self, kind, *ids):
+        """Drops deleted bands or venues, once it is committed"""
+
+        def change():
+            for id in ids:
+                self._remove(kind, id)
+
+        self.apply(kind, change)
+
+    def apply(self, kind, change):
+        with self._lock:
+            if self.entries is None:
+                return
+
+            change()
+            if self.replay is not None:
+                self.replay.append(change)
+                return
+            known = self.versions
+
+        self.record(kind, known)
+
+    def record(self, kind, known):
+        """Takes the table versions after this worker's write to kind,
+        so it is not rebuilt for its own change
+
+        only when kind's table moved on from known by exactly that one
+        write and the others did not, anything else came from
+        another worker
+        """
+        if known is None:
+            return
+
+        table = sources[kind][0].__tablename__
+        versions = self.table_versions()
+        expected = sorted((name, version + (name == table)) \
+                          for name, version in known)
+        with self._lock:
+            if versions == expected and self.versions == known:
+                self.versions = versions
+
+    def _remove(self, kind, id):
+        name = self.names.pop((kind, id), None)
+        if name is None:
+            return
+
+        for key in keys(name):
+            position = bisect_left(self.entries, (key, kind, id, name))
+            if position < len(self.entries) and \
+                    self.entries[position] == (key, kind, id, name):
+                del self.entries[position]
+
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,330 @@
+try:
+    import json
+    import random
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import count
+    from threading import Lock, get_ident
+    from time import perf_counter
+
+    import click
+    from flask import Blueprint, current_app
+    from sqlalchemy import event
+
+    from main import db
+    from models.band import Band
+    from models.show import Show
+    from models.user import User
+    from models.venue import Venue
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+bench_commands = Blueprint("bench", __name__)
+
+
+# Collects latency and query counts per route while a profile runs
+# queries are counted with an engine event, per thread,
+# so concurrent requests do not count each other's queries
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.queries = {}
+        self.statuses = {}
+        self._lock = Lock()
+        self._counts = {}
+
+    def count_query(self, *args):
+        thread = get_ident()
+        if thread in self._counts:
+            self._counts[thread] += 1
+
+    def start(self):
+        self._counts[get_ident()] = 0
+
+    def record(self, route, elapsed, status):
+        queries = self._counts.pop(get_ident(), 0)
+        with self._lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+            self.queries.setdefault(route, []).append(queries)
+            self.statuses.setdefault(route, {}).setdefault(status, 0)
+            self.statuses[route][status] += 1
+
+    def summary(self, duration):
+        """Returns stats per route plus ALL across every route
+        
+        a route's throughput is its requests over the whole run
+        """
+        routes = dict(self.latencies)
+        routes["ALL"] = [latency for latencies in self.latencies.values() \
+                         for latency in latencies]
+
+        results = {}
+        for route, latencies in routes.items():
+            latencies = sorted(latencies)
+            if route == "ALL":
+                queries = [queries for counts in self.queries.values() \
+                           for queries in counts]
+                statuses = {}
+                for counts in self.statuses.values():
+                    for status, total in counts.items():
+                        statuses[status] = statuses.get(status, 0) + total
+            else:
+                queries = self.queries[route]
+                statuses = self.statuses[route]
+            results[route] = {
+                "requests" : len(latencies),
+                "p50_ms" : percentile(latencies, 50) * 1000,
+                "p95_ms" : percentile(latencies, 95) * 1000,
+                "p99_ms" : percentile(latencies, 99) * 1000,
+                "throughput_rps" : len(latencies) / duration,
+                "queries_per_request" : sum(queries) / len(queries),
+                "statuses" : statuses
+            }
+        return results
+
+
+def percentile(ordered, rank):
+    index = min(len(ordered) - 1, int(len(ordered) * rank / 100))
+    return ordered[index]
+
+
+# Ids of existing rows, sampled once so requests hit real records
+def sample_ids(model, rng, size=1000):
+    ids = db.session.scalars(db.select(model.id).limit(size * 10)).all()
+    if not ids:
+        raise click.ClickException(
+            f"{model.__tablename__} is empty, seed the database first")
+    return rng.sample(ids, min(size, len(ids)))
+
+
+def login(client, email, password):
+    response = client.post("/users/login",
+                           json={"email" : email, "password" : password})
+    if response.status_code != 200:
+        raise click.ClickException(f"could not log in as {email}")
+    return {"Authorization" : f"Bearer {response.json['token']}"}
+
+
+# Load profiles, each returns a function that makes one request
+# as (route label, method, url, request options)
+def browse_profile(client, rng):
+    """Anonymous browsing of listings, searches and detail pages"""
+
+    show_ids = sample_ids(Show, rng)
+    band_ids = sample_ids(Band, rng)
+    venue_ids = sample_ids(Venue, rng)
+    genres = db.session.scalars(db.select(Band.genre).distinct()).all()
+
+    requests = [
+        lambda: ("GET /shows/", "get", "/shows/", {}),
+        lambda: ("GET /shows/?order=date", "get",
+                 f"/shows/?order=date&after={rng.choice(show_ids)}", {}),
+        lambda: ("GET /bands/", "get", "/bands/", {}),
+        lambda: ("GET /venues/", "get", "/venues/", {}),
+        lambda: ("GET /bands/display/search?genre", "get",
+                 f"/bands/display/search?genre={rng.choice(genres)}", {}),
+        lambda: ("GET /shows/display/search?venue", "get",
+                 f"/shows/display/search?venue={rng.choice(venue_ids)}", {}),
+        lambda: ("GET /bands/display/band/<id>", "get",
+                 f"/bands/display/band/{rng.choice(band_ids)}", {}),
+        lambda: ("GET /shows/display/show/<id>", "get",
+                 f"/shows/display/show/{rng.choice(show_ids)}", {}),
+        lambda: ("GET /venues/display/venue/<id>", "get",
+                 f"/venues/display/venue/{rng.choice(venue_ids)}", {}),
+    ]
+    return lambda: rng.choice(requests)()
+
+
+def write_profile(client, rng):
+    """Authenticated band, venue and show creation and updates
+
+    registers its own user, so the rows it writes are easy to find
+    """
+    email = f"bench.{rng.randrange(10 ** 9)}@example.com"
+    client.post("/users/register", json={
+        "first_name" : "Bench", "last_name" : "User",
+        "email" : email, "password" : "benchmark1"})
+    headers = login(client, email, "benchmark1")
+
+    numbers = count()
+    band = client.post("/bands/create", headers=headers, json={
+        "band_name" : f"Bench Band {email}", "genre" : "Punk",
+        "state" : "VIC"}).json
+    venue = client.post("/venues/register/", headers=headers, json={
+        "venue_name" : f"Bench Venue {email}",
+        "location" : "1 Bench St, VIC"}).json
+    show = client.post(f"/shows/create/show/?venue={venue['id']}",
+                       headers=headers, json={
+        "show_name" : f"Bench Show {email}", "date" : "01/01/2030",
+        "band_id" : band["id"]}).json
+
+    def band_update():
+        return ("PUT /bands/update/<id>", "put",
+                f"/bands/update/{band['id']}",
+                {"headers" : headers, "json" : {
+                    "band_name" : f"Bench Band {email} {next(numbers)}",
+                    "genre" : "Punk", "state" : "VIC"}})
+
+    def show_creation():
+        return ("POST /shows/create/show/", "post",
+                f"/shows/create/show/?venue={venue['id']}",
+                {"headers" : headers, "json" : {
+                    "show_name" : f"Bench Show {email} {next(numbers)}",
+                    "date" : "01/01/2030", "band_id" : band["id"]}})
+
+    def show_update():
+        return ("PUT /shows/update/show/<id>", "put",
+                f"/shows/update/show/{show['id']}?venue={venue['id']}",
+                {"headers" : headers, "json" : {
+                    "show_name" : f"Bench Show {email}",
+                    "date" : "02/01/2030", "band_id" : band["id"]}})
+
+    requests = [band_update, show_creation, show_update]
+    return lambda: rng.choice(requests)()
+
+
+def login_profile(client, rng):
+    """Bursts of logins, dominated by password hashing"""
+
+    email = db.session.scalars(
+        db.select(User.email).order_by(User.id).limit(1)).first()
+    if email is None:
+        raise click.ClickException("USERS is empty, seed the database first")
+    password = current_app.config["BENCHMARK_PASSWORD"]
+
+    return lambda: ("POST /users/login", "post", "/users/login",
+                    {"json" : {"email" : email, "password" : password}})
+
+
+profiles = {
+    "browse" : browse_profile,
+    "write" : write_profile,
+    "login" : login_profile,
+}
+
+
+def compare(results, baseline, threshold, min_delta_ms, min_samples):
+    """Returns the regressions of results against baseline
+
+    latency and queries may not grow, and throughput may not fall,
+    by more than threshold (0.2 = 20%)
+    latency changes under min_delta_ms are treated as noise, as are
+    routes with fewer than min_samples requests in either run
+    a route's share of a random mix varies between runs, so
+    throughput is only compared across ALL routes
+    """
+    regressions = []
+    for route, current in results.items():
+        previous = baseline.get(route)
+        if not previous or \
+                min(current["requests"], previous["requests"]) < min_samples:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms",
+                       "queries_per_request"):
+            noise = min_delta_ms if metric.endswith("_ms") else 0
+            if current[metric] > previous[metric] * (1 + threshold) and \
+                    current[metric] - previous[metric] > noise:
+                regressions.append(
+                    f"{route} {metric} {previous[metric]:.2f} -> "
+                    f"{current[metric]:.2f}")
+        if route == "ALL" and current["throughput_rps"] < \
+                previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{route} throughput_rps {previous['throughput_rps']:.2f}"
+                f" -> {current['throughput_rps']:.2f}")
+    return regressions
+
+
+# bench function to drive a load profile against the app in process
+# uses the database the app is configured with, seed it first
+# (flask db seed or flask db seed-bulk)
+# --warmup requests run first and are not recorded
+# prints p50/p95/p99 latency, throughput and queries per request
+# per route, --save stores them as the profile's baseline and
+# otherwise any regression past --threshold exits with an error
+# routes with fewer than --min-samples requests are not compared
+@bench_commands.cli.command("run")
+@click.option("--profile", type=click.Choice(list(profiles)),
+              default="browse")
+@click.option("--requests", "total", default=500)
+@click.option("--concurrency", default=1)
+@click.option("--baseline", "baseline_path", default="benchmarks.json")
+@click.option("--warmup", default=20)
+@click.option("--threshold", default=0.2)
+@click.option("--min-delta-ms", default=2.0)
+@click.option("--min-samples", default=30)
+@click.option("--save", is_flag=True)
+@click.option("--seed", default=2023)
+def run_benchmark(profile, total, concurrency, baseline_path, warmup,
+                  threshold, min_delta_ms, min_samples, save, seed):
+    rng = random.Random(seed)
+    app = current_app._get_current_object()
+    next_request = profiles[profile](app.test_client(), rng)
+
+    recorder = Recorder()
+
+    def worker(requests):
+        client = app.test_client()
+        for route, method, url, options in requests:
+            recorder.start()
+            started = perf_counter()
+            response = getattr(client, method)(url, **options)
+            recorder.record(route, perf_counter() - started,
+                            response.status_code)
+
+    worker([next_request() for _ in range(warmup)])
+    recorder = Recorder()
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", recorder.count_query)
+
+    # requests are built up front so the RNG stays in one thread
+    planned = [next_request() for _ in range(total)]
+    shares = [planned[i::concurrency] for i in range(concurrency)]
+
+    started = perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, shares))
+    duration = perf_counter() - started
+
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", recorder.count_query)
+
+    results = recorder.summary(duration)
+    for route, stats in sorted(results.items()):
+        print(f"{route}: {stats['requests']} requests, "
+              f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+              f"p99 {stats['p99_ms']:.1f} ms, "
+              f"{stats['throughput_rps']:.1f} req/s, "
+              f"{stats['queries_per_request']:.1f} queries/request, "
+              f"statuses {stats['statuses']}")
+
+    try:
+        with open(baseline_path) as baseline_file:
+            baselines = json.load(baseline_file)
+    except FileNotFoundError:
+        baselines = {}
+
+    if save:
+        baselines[profile] = results
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {baseline_path}")
+        return
+
+    if profile not in baselines:
+        print(f"No {profile} baseline in {baseline_path}, "
+              "run with --save to store one")
+        return
+
+    regressions = compare(results, baselines[profile], threshold,
+                          min_delta_ms, min_samples)
+    if regressions:
+        print("Regressions found:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+    print(f"No regressions beyond {threshold:.0%}")
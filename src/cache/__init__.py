@@ -0,0 +1,8 @@
+try:
+    from .backends import CacheBackend, LRUCache
+    from .identity import Identity, IdentityCache
+    from .interests import InterestCache
+    from .response import ResponseCache
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
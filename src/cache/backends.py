@@ -0,0 +1,69 @@
+try:
+    from collections import OrderedDict
+    from threading import Lock
+    from time import monotonic
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Interface every cache store implements
+# values are plain python data (dicts, lists, strings, numbers)
+# so a shared store such as redis can serialize them
+# get returns None on a miss or an expired entry
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+# In-process cache store with a time to live per entry
+# and least recently used eviction once maxsize entries are held
+# safe to share between the threads of one worker
+class LRUCache(CacheBackend):
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the value stored under key or None"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires < monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """Stores value under key for ttl seconds"""
+
+        with self._lock:
+            self._entries[key] = (value, monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
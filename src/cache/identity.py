@@ -0,0 +1,73 @@
+try:
+    from .backends import LRUCache
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Identity holds what the authorization checks need to know
+# about a logged in user without loading the user row
+# id and admin flag, plus the ids of the bands and venues they own
+class Identity:
+    def __init__(self, id, admin, band_ids, venue_ids):
+        self.id = id
+        self.admin = admin
+        self.band_ids = set(band_ids)
+        self.venue_ids = set(venue_ids)
+
+    def to_dict(self):
+        return {
+            "id" : self.id,
+            "admin" : self.admin,
+            "band_ids" : sorted(self.band_ids),
+            "venue_ids" : sorted(self.venue_ids)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["admin"],
+                   data["band_ids"], data["venue_ids"])
+
+
+# Identity cache keyed by JWT subject
+# in-process LRU by default, init_app accepts any CacheBackend
+# so workers can share one store
+# entries are stored with a stamp, such as the versions of the
+# tables an identity is built from, and are missed once the stamp
+# given on a get differs, so no worker keeps stale authorization
+# entries live IDENTITY_CACHE_TTL seconds and are also invalidated
+# when the user, or the bands and venues they own, change
+class IdentityCache:
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.ttl = 60
+        if app is not None:
+            self.init_app(app, backend)
+
+    def init_app(self, app, backend=None):
+        self.ttl = app.config["IDENTITY_CACHE_TTL"]
+        self.backend = backend or self.backend or \
+            LRUCache(app.config["IDENTITY_CACHE_SIZE"])
+
+    def key(self, subject):
+        return f"identity:{subject}"
+
+    def get(self, subject, stamp):
+        """Returns the cached Identity for a JWT subject or None
+        when there is none cached under stamp
+        """
+        data = self.backend.get(self.key(subject))
+        if data is None or data["stamp"] != stamp:
+            return None
+
+        return Identity.from_dict(data)
+
+    def set(self, subject, identity, stamp):
+        data = identity.to_dict()
+        data["stamp"] = stamp
+        self.backend.set(self.key(subject), data, self.ttl)
+
+    def invalidate(self, user_id):
+        """Drops the cached identity of a user"""
+
+        self.backend.delete(self.key(user_id))
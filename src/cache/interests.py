@@ -0,0 +1,45 @@
+try:
+    from .backends import LRUCache
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Feed interests keyed by user id, the ids of the bands headlining
+# or playing the shows a user attends
+# in-process LRU by default, init_app accepts any CacheBackend
+# so workers can share one store
+# entries live FEED_INTEREST_TTL seconds and are invalidated when
+# the user's attendances, or the line up of a show they attend, change
+class InterestCache:
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app, backend)
+
+    def init_app(self, app, backend=None):
+        self.ttl = app.config["FEED_INTEREST_TTL"]
+        self.backend = backend or self.backend or \
+            LRUCache(app.config["FEED_INTEREST_CACHE_SIZE"])
+
+    def key(self, user_id):
+        return f"interests:{user_id}"
+
+    def get(self, user_id):
+        """Returns the cached band ids of a user or None"""
+
+        band_ids = self.backend.get(self.key(user_id))
+        if band_ids is None:
+            return None
+
+        return set(band_ids)
+
+    def set(self, user_id, band_ids):
+        self.backend.set(self.key(user_id), sorted(band_ids), self.ttl)
+
+    def invalidate(self, *user_ids):
+        """Drops the cached interests of each user"""
+
+        for user_id in user_ids:
+            self.backend.delete(self.key(user_id))
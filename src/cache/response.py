@@ -0,0 +1,116 @@
+try:
+    from functools import wraps
+    from threading import Lock
+    from urllib.parse import urlencode
+
+    from flask import g, make_response, request
+
+    from .backends import LRUCache
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+def request_tables(tables, when):
+    """Returns tables plus each table of when, a dict of table names
+    to query args, that the request has one of the args of
+    """
+    return tuple(tables) + tuple(
+        table for table, args in (when or {}).items() \
+            if any(arg in request.args for arg in args))
+
+
+# Server side cache for public read routes
+# in-process LRU by default, init_app accepts any CacheBackend
+# responses are keyed by path, sorted query args and the
+# TABLE_VERSIONS counter of each table the route reads, a write
+# bumps the counter so every worker misses the responses built
+# before it from then on, with nothing to invalidate
+# versions are read before the route runs, so a response is never
+# kept under a version newer than the data it was built from
+# users pinned to the primary after a write skip the lookup, so they
+# always see their own changes
+# responses built from data marked g.stale are not stored
+# counts hits and misses for monitoring
+class ResponseCache:
+    def __init__(self, app=None, versions=None, backend=None):
+        self.backend = backend
+        self.versions = versions
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app, versions, backend)
+
+    def init_app(self, app, versions, backend=None):
+        """versions returns the TableVersion rows of some table names,
+        keyed by table name
+        """
+        self.ttl = app.config["RESPONSE_CACHE_TTL"]
+        self.versions = versions
+        self.backend = backend or self.backend or \
+            LRUCache(app.config["RESPONSE_CACHE_SIZE"])
+
+    def key(self, tables):
+        versions = self.versions(tables)
+        tokens = [f"{table}={versions[table].version}" \
+                  if table in versions else f"{table}=0" \
+                      for table in tables]
+        args = urlencode(sorted(request.args.items(multi=True)))
+
+        return f"response:{request.path}?{args}:{':'.join(tokens)}"
+
+    def count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        return {"hits" : self.hits, "misses" : self.misses}
+
+    def cached(self, *tables, when=None):
+        """Decorator caching a route's 200 responses
+
+        takes the names of the tables the route reads, and in when
+        tables it only reads given certain query args
+        a hit still answers If-None-Match / If-Modified-Since
+        from the stored ETag and Last-Modified
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.key(request_tables(tables, when))
+
+                entry = None if g.get("pinned") else self.backend.get(key)
+                if entry is not None:
+                    self.count(True)
+
+                    response = make_response(entry["body"])
+                    response.content_type = "application/json"
+                    response.headers["X-Cache"] = "HIT"
+                    if entry["etag"]:
+                        response.headers["ETag"] = entry["etag"]
+                    if entry["last_modified"]:
+                        response.headers["Last-Modified"] = \
+                            entry["last_modified"]
+
+                    return response.make_conditional(request)
+
+                self.count(False)
+
+                response = make_response(func(*args, **kwargs))
+                if response.status_code == 200 and not g.get("stale"):
+                    self.backend.set(key, {
+                        "body" : response.get_data(as_text=True),
+                        "etag" : response.headers.get("ETag"),
+                        "last_modified" : \
+                            response.headers.get("Last-Modified")
+                    }, self.ttl)
+                response.headers["X-Cache"] = "MISS"
+
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,74 @@
+try:
+    from functools import lru_cache
+
+    from sqlalchemy import event, inspect
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Child rows are deleted by the database through ON DELETE CASCADE
+# foreign keys, so the session only ever sees the parent's delete
+# the tables those deletes reach are worked out from the foreign
+# keys, so table versions and cached responses built from the
+# children are still invalidated
+@lru_cache(maxsize=None)
+def cascaded_tables(table):
+    """Returns the names of the tables table's deletes cascade to,
+    followed through every level
+    """
+    tables = set()
+    parents = [table]
+    while parents:
+        parent = parents.pop()
+        for child in table.metadata.sorted_tables:
+            for key in child.foreign_keys:
+                if key.column.table is parent and \
+                        key.ondelete == "CASCADE" and \
+                            child.name not in tables:
+                    tables.add(child.name)
+                    parents.append(child)
+
+    return frozenset(tables)
+
+
+def counts_only(instance):
+    """Returns whether a changed instance only changed counter
+    columns, those with info={"counter" : True}
+
+    a counter of another table's rows changes with that table,
+    which is versioned in its own right
+    """
+    columns = instance.__table__.columns
+    changed = [attr.key for attr in inspect(instance).attrs \
+               if attr.history.has_changes()]
+
+    return bool(changed) and all(
+        key in columns and columns[key].info.get("counter") \
+            for key in changed)
+
+
+def changed_tables(session):
+    """Returns the names of the tables a flush of session writes to,
+    including the tables its deletes cascade to
+    """
+    tables = {instance.__table__.name for instance in session.new}
+    tables.update(instance.__table__.name for instance in session.dirty \
+                  if not counts_only(instance))
+    for instance in session.deleted:
+        tables.add(instance.__table__.name)
+        tables.update(cascaded_tables(instance.__table__))
+
+    return tables
+
+
+def foreign_keys_on(connection, record):
+    connection.execute("PRAGMA foreign_keys=ON")
+
+
+def enforce_foreign_keys(engine):
+    """Switches on foreign keys, and their cascades, for each new
+    SQLite connection, other databases always enforce them
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", foreign_keys_on)
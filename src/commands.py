@@ -1,13 +1,27 @@
 try:
+    import csv
+    import io
+    import random
+    import sys
+    from datetime import date, datetime, timedelta
+
+    import click
     from main import db, bcrypt
     from flask import Blueprint
     from models.attending import Attending
     from models.band import Band
     from models.playing import Playing
     from models.show import Show
+    from models.show_detail import ShowDetail, refresh_show_details
+    from models.table_version import TableVersion, stage_tables
     from models.venue import Venue
     from models.user import User
+    from schemas.show_schema import date_format
+    from feed import feed_query
+    from search import search_indexes
+    from sqlalchemy import func, inspect, text
     from sqlalchemy.exc import OperationalError
+    from sqlalchemy.schema import AddConstraint, CreateTable
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
@@ -168,7 +182,7 @@ def seed_db():
 
         show1 = Show(
             show_name = "Midnight Madness",
-            date = "19/12/2023",
+            date = date(2023, 12, 19),
             band_id = 2,
             venue_id = 1,
         )
@@ -176,7 +190,7 @@ def seed_db():
 
         show2 = Show(
             show_name = "A Night of Speed",
-            date = "13/05/2023",
+            date = date(2023, 5, 13),
             band_id = 4,
             venue_id = 4,
         )
@@ -184,7 +198,7 @@ def seed_db():
 
         show3 = Show(
             show_name = "Perth Noise",
-            date = "05/10/2023",
+            date = date(2023, 10, 5),
             band_id = 5,
             venue_id = 5,
         )
@@ -231,6 +245,9 @@ def seed_db():
         db.session.add(playing4)
 
         db.session.commit()
+
+        count_attendees()
+        db.session.commit()
         
         print("table seeded")
     except NameError:
@@ -239,6 +256,513 @@ def seed_db():
     except OperationalError:
         print("please check that server is on and connected")
 
+# Indexes of SHOWS that migrate-dates creates
+date_indexes = ("ix_shows_date_id", "ix_shows_venue_id_date")
+
+# db function to migrate SHOWS.date from "dd/mm/yyyy" strings
+# to a native DATE column and create the date index
+# safe to run more than once
+@db_commands .cli.command("migrate-dates")
+def migrate_show_dates():
+    try:
+        columns = inspect(db.engine).get_columns("SHOWS")
+        date_column = [column for column in columns \
+                       if column["name"] == "date"][0]
+
+        if db.engine.dialect.name == "postgresql":
+            if not isinstance(date_column["type"], db.Date):
+                db.session.execute(text(
+                    'ALTER TABLE "SHOWS" ALTER COLUMN date TYPE DATE '
+                    "USING to_date(date, 'DD/MM/YYYY')"
+                ))
+        else:
+            # Other databases keep dates as ISO strings,
+            # rewrite any rows still in dd/mm/yyyy
+            rows = db.session.execute(text(
+                'SELECT id, date FROM "SHOWS" WHERE date LIKE \'%/%\''
+            ))
+            for show_id, show_date in rows.all():
+                parsed = datetime.strptime(show_date, date_format).date()
+                db.session.execute(text(
+                    'UPDATE "SHOWS" SET date = :date WHERE id = :id'
+                ), {"date" : parsed.isoformat(), "id" : show_id})
+
+        db.session.commit()
+
+        # only the date indexes, the others may be on columns
+        # this database does not have yet
+        for index in Show.__table__.indexes:
+            if index.name in date_indexes:
+                index.create(db.engine, checkfirst=True)
+
+        print("Show dates migrated")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+def missing_cascades(inspector, table):
+    """Returns whether any of table's foreign keys lack the
+    ON DELETE CASCADE the model declares
+    """
+    reflected = {
+        tuple(key["constrained_columns"]) : \
+            (key["options"].get("ondelete") or "").upper()
+        for key in inspector.get_foreign_keys(table.name)
+    }
+
+    return any(
+        reflected.get(tuple(constraint.column_keys)) != constraint.ondelete
+        for constraint in table.foreign_key_constraints
+    )
+
+def rebuild_table(connection, table):
+    """Recreates an SQLite table from its model, keeping its rows
+
+    SQLite cannot alter a constraint, so the table is created under
+    a new name, its rows copied over and the old table replaced
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    new_table = table.to_metadata(db.metadata, name=f"{table.name}_new")
+    try:
+        connection.execute(CreateTable(new_table))
+    finally:
+        db.metadata.remove(new_table)
+
+    existing = {column["name"] for column in \
+                inspect(connection).get_columns(table.name)}
+    columns = ", ".join(quote(column.name) for column in table.columns \
+                        if column.name in existing)
+    connection.exec_driver_sql(
+        f"INSERT INTO {quote(new_table.name)} ({columns}) "
+        f"SELECT {columns} FROM {quote(table.name)}")
+    connection.exec_driver_sql(f"DROP TABLE {quote(table.name)}")
+    connection.exec_driver_sql(
+        f"ALTER TABLE {quote(new_table.name)} RENAME TO {quote(table.name)}")
+
+    for index in table.indexes:
+        index.create(connection)
+
+# db function to add ON DELETE CASCADE to the foreign keys of a
+# database created before the models declared it, so deletes of
+# users, bands, venues and shows cascade in the database
+# Postgres replaces each table's foreign keys in place, SQLite
+# tables are rebuilt with foreign keys off while rows are copied
+# safe to run more than once
+@db_commands .cli.command("migrate-cascades")
+def migrate_cascades():
+    try:
+        inspector = inspect(db.engine)
+        tables = [table for table in db.metadata.sorted_tables \
+                  if inspector.has_table(table.name) and \
+                      missing_cascades(inspector, table)]
+
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.begin() as connection:
+                quote = connection.dialect.identifier_preparer.quote
+                for table in tables:
+                    for key in inspector.get_foreign_keys(table.name):
+                        connection.exec_driver_sql(
+                            f"ALTER TABLE {quote(table.name)} "
+                            f"DROP CONSTRAINT {quote(key['name'])}")
+                    for constraint in table.foreign_key_constraints:
+                        connection.execute(AddConstraint(constraint))
+        elif tables:
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+                with connection.begin():
+                    for table in tables:
+                        rebuild_table(connection, table)
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+        print(f"{len(tables)} tables migrated to cascading deletes")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+def count_attendees():
+    """Sets every show's attendee_count from its ATTENDING rows"""
+
+    attendees = db.select(func.count(Attending.id))\
+        .where(Attending.show_id == Show.id)\
+            .scalar_subquery()
+    Show.query.update({Show.attendee_count : attendees},
+                      synchronize_session=False)
+    stage_tables(db.session, {"ATTENDING"})
+
+# db function to add SHOWS.attendee_count to a database created
+# before it, count every show's attendees and create its index
+# also recounts shows after ATTENDING was changed outside the app
+# safe to run more than once
+@db_commands .cli.command("count-attendees")
+def migrate_attendee_counts():
+    try:
+        columns = inspect(db.engine).get_columns("SHOWS")
+        if "attendee_count" not in [column["name"] for column in columns]:
+            db.session.execute(text(
+                'ALTER TABLE "SHOWS" ADD COLUMN attendee_count INTEGER '
+                "NOT NULL DEFAULT 0"
+            ))
+
+        count_attendees()
+        db.session.commit()
+
+        for index in Show.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+        print("Show attendees counted")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+def build_show_details(batch_size):
+    """Rebuilds every show's details, batch_size shows at a time"""
+
+    connection = db.session.connection()
+    after = 0
+    while True:
+        show_ids = connection.execute(
+            db.select(Show.id).where(Show.id > after)\
+                .order_by(Show.id).limit(batch_size)).scalars().all()
+        if not show_ids:
+            break
+
+        refresh_show_details(connection, show_ids)
+        after = show_ids[-1]
+
+# db function to create SHOW_DETAILS on a database created before it
+# and build the details of every show
+# also rebuilds them after shows were changed outside the app
+# safe to run more than once
+@db_commands .cli.command("build-show-details")
+@click.option("--batch-size", default=1000)
+def build_show_details_command(batch_size):
+    try:
+        ShowDetail.__table__.create(db.engine, checkfirst=True)
+
+        build_show_details(batch_size)
+        db.session.commit()
+
+        print("Show details built")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+# db function to create the indexes declared on the models
+# on a database created before they were added
+# duplicate attending/playing rows are removed first, keeping the
+# oldest, so the unique indexes can be built
+# safe to run more than once
+@db_commands .cli.command("create-indexes")
+def create_indexes():
+    try:
+        for model, columns in ((Attending, ("user_id", "show_id")),
+                               (Playing, ("band_id", "show_id"))):
+            group = [getattr(model, column) for column in columns]
+            keep = db.session.query(func.min(model.id)).group_by(*group)
+            removed = model.query\
+                .filter(model.id.not_in(keep.scalar_subquery()))\
+                    .delete(synchronize_session=False)
+            print(f"{removed} duplicate {model.__tablename__} rows removed")
+
+        db.session.commit()
+
+        for model in (User, Band, Venue, Show, Playing, Attending):
+            for index in model.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.begin() as connection:
+                for table, ddl in search_indexes:
+                    connection.execute(ddl)
+
+        print("Indexes created")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+# Lookups the controllers filter on, each should be answered
+# through an index rather than a scan of the whole table
+def controller_lookups():
+    today = date.today()
+
+    return {
+        "band by name" : Band.query.filter_by(band_name="Uboa"),
+        "band by genre" : Band.query.filter_by(genre="Punk"),
+        "band by state" : Band.query.filter_by(state="VIC"),
+        "band by genre and state" : Band.query\
+            .filter_by(genre="Hardcore", state="VIC"),
+        "band by owner" : Band.query.filter_by(user_id=1),
+        "venue by name" : Venue.query.filter_by(venue_name="The Old Bar"),
+        "venue by owner" : Venue.query.filter_by(user_id=1),
+        "show by name" : Show.query.filter_by(show_name="Perth Noise"),
+        "show by band" : Show.query.filter_by(band_id=1),
+        "show by date" : Show.query.filter(Show.date >= today),
+        "show by venue and date" : Show.query\
+            .filter_by(venue_id=1).filter(Show.date >= today),
+        "playing by show" : Playing.query.filter_by(show_id=1),
+        "playing by band" : Playing.query.filter_by(band_id=1),
+        "attending by user" : Attending.query.filter_by(user_id=1),
+        "attending by show" : Attending.query.filter_by(show_id=1),
+        "show by attendee count" : Show.query\
+            .filter(Show.attendee_count >= 100),
+        "trending shows" : Show.query\
+            .filter(Show.date >= today, Show.date <= today + timedelta(30))\
+                .order_by(Show.attendee_count.desc(), Show.id.desc())\
+                    .limit(10),
+        "feed shows" : feed_query({1, 2}, today)\
+            .order_by(Show.date, Show.id).limit(50),
+    }
+
+def lookup_plans(connection):
+    """Returns the query plan of each controller lookup, by name
+
+    Postgres disables seq scans on connection so the plan shows
+    whether an index exists, not whether the table is small
+    """
+    dialect = connection.dialect
+    if dialect.name == "postgresql":
+        explain = "EXPLAIN "
+        connection.execute(text("SET enable_seqscan = off"))
+    else:
+        explain = "EXPLAIN QUERY PLAN "
+
+    plans = {}
+    for name, query in controller_lookups().items():
+        statement = str(query.statement.compile(
+            dialect=dialect,
+            compile_kwargs={"literal_binds" : True}
+        ))
+        plans[name] = " ".join(str(row[-1]) for row in \
+                               connection.execute(text(explain + statement)))
+
+    return plans
+
+def scans_table(plan):
+    """Returns whether a query plan reads a whole table"""
+
+    return "Seq Scan" in plan or ("SCAN" in plan and "INDEX" not in plan)
+
+# db function to EXPLAIN each controller lookup and fail
+# if any of them plans a sequential scan
+@db_commands .cli.command("check-indexes")
+def check_indexes():
+    try:
+        with db.engine.connect() as connection:
+            plans = lookup_plans(connection)
+
+        scans = [name for name, plan in plans.items() if scans_table(plan)]
+        for name, plan in plans.items():
+            print(f"{name}: {plan}")
+
+        if scans:
+            print(f"Sequential scans found: {', '.join(scans)}")
+            sys.exit(1)
+
+        print("All lookups use an index")
+    except OperationalError:
+        print("please check that server is on and connected")
+
+# Weighted choices for generated bands and venues
+# a few genres and the eastern states hold most of the catalogue
+bulk_genres = {
+    "Punk" : 30, "Hardcore" : 20, "Indie" : 15, "Metal" : 10,
+    "Black Metal" : 5, "Noise" : 5, "Electronic" : 8, "Folk" : 4,
+    "Jazz" : 2, "Hip Hop" : 1
+}
+bulk_states = {
+    "VIC" : 30, "NSW" : 30, "QLD" : 18, "WA" : 10,
+    "SA" : 7, "TAS" : 3, "ACT" : 1, "NT" : 1
+}
+bulk_words = ["Amber", "Broken", "Crimson", "Distant", "Electric", 
+              "Feral", "Golden", "Hollow", "Iron", "Lunar", "Neon",
+              "Silent", "Velvet", "Wild"]
+bulk_nouns = ["Wolves", "Static", "Tide", "Saints", "Engine", "Garden",
+              "Harbour", "Machine", "Signal", "Parade", "Room", "Hall"]
+
+
+def skewed(rng, count, skew):
+    """Returns an index below count, low indexes far more likely
+    
+    skew 1 is uniform, higher values give a longer tail
+    so a handful of rows become the hot ones
+    """
+    return int(count * rng.random() ** skew)
+
+
+def pick_distinct(rng, ids, count, skew):
+    """Returns count distinct ids, skewed towards the start of ids
+    
+    tops up uniformly once the skewed picks stop finding new ids
+    so asking for most of ids still finishes
+    """
+    picked = set()
+    for _ in range(count * 4):
+        if len(picked) == count:
+            return picked
+        picked.add(ids[skewed(rng, len(ids), skew)])
+
+    while len(picked) < count:
+        picked.add(rng.choice(ids))
+
+    return picked
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def bulk_name(rng, number):
+    return f"{rng.choice(bulk_words)} {rng.choice(bulk_nouns)} {number}"
+
+
+def next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def insert_batches(model, columns, rows, batch_size):
+    """Inserts rows, tuples in the order of columns, batch_size at a time
+
+    Postgres loads each batch with COPY, other databases
+    with one executemany insert per batch
+    """
+    table = model.__tablename__
+    postgres = db.engine.dialect.name == "postgresql"
+    total = 0
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) < batch_size:
+            continue
+        total += insert_batch(model, columns, batch, postgres)
+        batch = []
+    if batch:
+        total += insert_batch(model, columns, batch, postgres)
+
+    if postgres and "id" in columns:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'(SELECT max(id) FROM "{table}"))'))
+        db.session.commit()
+
+    print(f"{total} {table} rows inserted")
+
+
+def insert_batch(model, columns, batch, postgres):
+    if postgres:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+
+        connection = db.session.connection().connection
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY "{model.__tablename__}" ({", ".join(columns)}) '
+                "FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        db.session.execute(model.__table__.insert(),
+                           [dict(zip(columns, row)) for row in batch])
+
+    db.session.commit()
+
+    return len(batch)
+
+
+# db function to seed a large generated dataset for capacity testing
+# rows are appended after any existing ones, with realistic skew:
+# popular genres and states, a long tail of hot shows and bands
+# every user shares one password hash of "password123"
+# the same --seed gives the same data
+# at least one user, band, venue and show is generated, as
+# attendances and line ups are shared out among them
+@db_commands .cli.command("seed-bulk")
+@click.option("--users", default=10000, type=click.IntRange(min=1))
+@click.option("--bands", default=2000, type=click.IntRange(min=1))
+@click.option("--venues", default=500, type=click.IntRange(min=1))
+@click.option("--shows", default=20000, type=click.IntRange(min=1))
+@click.option("--attending", default=200000, type=click.IntRange(min=0))
+@click.option("--playing", default=40000, type=click.IntRange(min=0))
+@click.option("--batch-size", default=5000, type=click.IntRange(min=1))
+@click.option("--seed", default=2023)
+def seed_bulk(users, bands, venues, shows, attending, playing,
+              batch_size, seed):
+    try:
+        rng = random.Random(seed)
+        today = date.today()
+
+        password = bcrypt\
+            .generate_password_hash("password123").decode("utf-8")
+
+        first_user, first_band = next_id(User), next_id(Band)
+        first_venue, first_show = next_id(Venue), next_id(Show)
+
+        user_ids = range(first_user, first_user + users)
+        band_ids = range(first_band, first_band + bands)
+        venue_ids = range(first_venue, first_venue + venues)
+        show_ids = range(first_show, first_show + shows)
+
+        insert_batches(User, 
+            ("id", "first_name", "last_name", "email", "password", "admin"),
+            ((id, "Bulk", f"User {id}", f"bulk.user{id}@example.com",
+              password, False) for id in user_ids),
+            batch_size)
+
+        insert_batches(Band, 
+            ("id", "band_name", "genre", "state", "user_id"),
+            ((id, bulk_name(rng, id), weighted(rng, bulk_genres),
+              weighted(rng, bulk_states), rng.choice(user_ids)) \
+                for id in band_ids),
+            batch_size)
+
+        insert_batches(Venue, 
+            ("id", "venue_name", "location", "user_id"),
+            ((id, f"The {bulk_name(rng, id)}",
+              f"{rng.randrange(1, 400)} {rng.choice(bulk_words)} St, "
+              f"{weighted(rng, bulk_states)}", rng.choice(user_ids)) \
+                for id in venue_ids),
+            batch_size)
+
+        # shows fall a year either side of today,
+        # hot bands and venues host most of them
+        insert_batches(Show, 
+            ("id", "show_name", "date", "band_id", "venue_id"),
+            ((id, f"{bulk_name(rng, id)} Night",
+              today + timedelta(days=rng.randrange(-365, 366)),
+              band_ids[skewed(rng, bands, 2)],
+              venue_ids[skewed(rng, venues, 2)]) for id in show_ids),
+            batch_size)
+
+        # each user attends their share of attending rows,
+        # picked from the hot end of the shows
+        def attending_rows():
+            share, extra = divmod(attending, users)
+            for position, user_id in enumerate(user_ids):
+                count = min(share + (position < extra), shows)
+                for show_id in pick_distinct(rng, show_ids, count, 3):
+                    yield (user_id, show_id)
+
+        insert_batches(Attending, ("user_id", "show_id"),
+                       attending_rows(), batch_size)
+
+        # each show's line up takes its share of playing rows
+        def playing_rows():
+            share, extra = divmod(playing, shows)
+            for position, show_id in enumerate(show_ids):
+                count = min(share + (position < extra), bands)
+                for band_id in pick_distinct(rng, band_ids, count, 2):
+                    yield (band_id, show_id)
+
+        insert_batches(Playing, ("band_id", "show_id"),
+                       playing_rows(), batch_size)
+
+        count_attendees()
+        build_show_details(batch_size)
+
+        # bulk inserts skip the session hooks, bump the versions here
+        stage_tables(db.session,
+                     {"USERS", "BANDS", "VENUES", "SHOWS",
+                      "ATTENDING", "PLAYING"})
+        db.session.commit()
+
+        print("bulk seed complete")
+    except OperationalError:
+        print("please check that server is on and connected")
+
 @db_commands .cli.command("drop")
 def drop_db():
     try:
@@ -7,6 +7,94 @@ class Config(object):
 
     JSON_SORT_KEYS = False
 
+    # Keyset pagination page sizes for collection routes
+    PAGE_SIZE_DEFAULT = 50
+    PAGE_SIZE_MAX = 100
+
+    # Logged in user identities cached per worker,
+    # entries expire after IDENTITY_CACHE_TTL seconds
+    IDENTITY_CACHE_SIZE = 1024
+    IDENTITY_CACHE_TTL = 60
+
+    # Bands behind each logged in user's feed cached per worker,
+    # entries expire after FEED_INTEREST_TTL seconds
+    FEED_INTEREST_CACHE_SIZE = 4096
+    FEED_INTEREST_TTL = 300
+
+    # Public listing and search responses cached per worker,
+    # keyed on TABLE_VERSIONS so no worker serves a response
+    # built before a write, a shared backend shares the entries
+    RESPONSE_CACHE_SIZE = 4096
+    RESPONSE_CACHE_TTL = 300
+
+    # bcrypt cost factor, 2^rounds iterations per hash
+    BCRYPT_LOG_ROUNDS = 12
+
+    # Worker processes that hash passwords off the request thread,
+    # calls past PASSWORD_QUEUE_DEPTH get a 503 with
+    # Retry-After: PASSWORD_RETRY_AFTER seconds
+    PASSWORD_POOL_SIZE = 2
+    PASSWORD_QUEUE_DEPTH = 16
+    PASSWORD_RETRY_AFTER = 1
+
+    # Per request query counts and timings, Server-Timing headers
+    # and /internal/metrics, off unless a config opts in
+    # requests past either threshold are logged as slow
+    INSTRUMENTATION_ENABLED = False
+    SLOW_REQUEST_MS = 500
+    SLOW_REQUEST_QUERIES = 20
+
+    # Bearer token Prometheus scrapes /internal/prometheus with,
+    # without one the route is only served when METRICS_OPEN
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    METRICS_OPEN = False
+
+    # Connection pool per worker process, every gunicorn worker may
+    # hold DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so keep
+    # workers * (size + overflow) under Postgres max_connections
+    # checkouts waiting past DB_POOL_TIMEOUT seconds get a 503 with
+    # Retry-After: DB_RETRY_AFTER, queries running past
+    # DB_STATEMENT_TIMEOUT_MS are cancelled by Postgres
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 5
+    DB_POOL_TIMEOUT = 10
+    DB_POOL_RECYCLE = 1800
+    DB_POOL_PRE_PING = True
+    DB_STATEMENT_TIMEOUT_MS = 10000
+    DB_RETRY_AFTER = 1
+
+    # Band and venue name suggestions per /autocomplete request,
+    # each worker's index picks up other workers' changes within
+    # AUTOCOMPLETE_REFRESH_SECONDS
+    AUTOCOMPLETE_SIZE_DEFAULT = 10
+    AUTOCOMPLETE_SIZE_MAX = 25
+    AUTOCOMPLETE_REFRESH_SECONDS = 30
+
+    # Shows per /shows/trending request, and the days from today
+    # it looks over when no date window is given
+    TRENDING_SIZE_DEFAULT = 10
+    TRENDING_SIZE_MAX = 50
+    TRENDING_DAYS = 30
+
+    # Rows fetched per round trip while streaming an export
+    EXPORT_BATCH_SIZE = 1000
+
+    # Rows validated and committed together by bulk imports,
+    # and the most rejected rows an import reports
+    IMPORT_BATCH_SIZE = 1000
+    IMPORT_MAX_ERRORS = 1000
+
+    # Read replicas as a comma separated REPLICA_DATABASE_URLS,
+    # read only routes are spread over them round robin
+    # a replica that fails is skipped for REPLICA_RETRY_SECONDS
+    # replicas are assumed to lag at most REPLICA_LAG_SECONDS, users
+    # read from the primary for that long after their own writes
+    REPLICA_LAG_SECONDS = 5
+    REPLICA_RETRY_SECONDS = 30
+
+    # Password of the first user, used by the login benchmark
+    BENCHMARK_PASSWORD = "password123"
+
     @property
     def SQLALCHEMY_DATABASE_URI(self):
         
@@ -16,19 +104,70 @@ class Config(object):
             raise ValueError("DATABASE_URI not set")
         
         return value
+
+    @property
+    def SQLALCHEMY_BINDS(self):
+        value = os.environ.get("REPLICA_DATABASE_URLS", "")
+        urls = [url.strip() for url in value.split(",") if url.strip()]
+
+        return {f"replica_{number}" : dict(self.SQLALCHEMY_ENGINE_OPTIONS,
+                                           url=url) \
+                for number, url in enumerate(urls)}
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        # SQLite has no server side pool or statement timeout,
+        # so it keeps SQLAlchemy's defaults
+        if self.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+            return {}
+
+        return {
+            "pool_size" : self.DB_POOL_SIZE,
+            "max_overflow" : self.DB_MAX_OVERFLOW,
+            "pool_timeout" : self.DB_POOL_TIMEOUT,
+            "pool_recycle" : self.DB_POOL_RECYCLE,
+            "pool_pre_ping" : self.DB_POOL_PRE_PING,
+            "connect_args" : {"options" : \
+                f"-c statement_timeout={self.DB_STATEMENT_TIMEOUT_MS}"}
+        }
     
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
+    INSTRUMENTATION_ENABLED = True
+    METRICS_OPEN = True
+
+    # a single local worker, slow queries are allowed to finish
+    DB_POOL_SIZE = 2
+    DB_MAX_OVERFLOW = 2
+    DB_STATEMENT_TIMEOUT_MS = 60000
+
 
 class ProductionConfig(Config):
-    pass
+    # sized per deployment, see the pool settings in Config
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 5))
+    DB_STATEMENT_TIMEOUT_MS = \
+        int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 5000))
 
 
 class TestingConfig(Config):
     TESTING = True
 
+    METRICS_OPEN = True
+
+    # small pool with no overflow, so leaked checkouts time out quickly
+    DB_POOL_SIZE = 2
+    DB_MAX_OVERFLOW = 0
+    DB_POOL_TIMEOUT = 2
+    DB_STATEMENT_TIMEOUT_MS = 5000
+
+    # cheapest bcrypt cost, hashed inline
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_POOL_SIZE = 0
+
 
 environment = os.environ.get("FLASK_ENV")
 
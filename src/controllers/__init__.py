@@ -3,6 +3,10 @@ try:
     from controllers.band_controller import bands
     from controllers.venue_controller import venues
     from controllers.show_controller import shows
+    from controllers.search_controller import search
+    from controllers.export_controller import exports
+    from controllers.import_controller import imports
+    from controllers.internal_controller import internal
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
@@ -11,5 +15,9 @@ registerable_controllers = [
     users,
     bands,
     venues,
-    shows
+    shows,
+    search,
+    exports,
+    imports,
+    internal
 ]
\ No newline at end of file
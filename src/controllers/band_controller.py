@@ -1,11 +1,17 @@
 try:
     from flask import Blueprint, jsonify, request
+    from sqlalchemy.orm import joinedload, selectinload
 
+    from decorators.conditional import conditional_get
     from decorators.error_decorator import error_handlers
+    from decorators.filters import get_filters
     from decorators.band_decorator import get_band_fromdb
+    from decorators.pagination import paginate
     from decorators.user_login import get_user_fromdb
     
-    from main import db
+    from autocomplete import autocomplete_index
+    from feed import invalidate_show
+    from main import db, identity_cache, replicas, response_cache
 
     from models.band import Band
     from models.playing import Playing
@@ -13,6 +19,7 @@ try:
 
     from schemas.band_schema import band_schema, bands_schema,\
           BandSchema
+    from schemas.filter_schema import band_filter_schema
     from schemas.playing_schema import playing_schema,\
           playing_schemas
 except ImportError:
@@ -22,31 +29,71 @@ except ImportError:
 bands = Blueprint("bands", __name__, url_prefix="/bands")
 
 
+# Relationships each band schema walks when dumping,
+# loaded up front so a page of bands costs a fixed number of queries
+# instead of one extra query per band per relationship
+# built on call as backrefs only exist once mappers are configured
+def band_load_options():
+    """Returns loaders for bands_schema: user, shows and playing"""
+
+    return (
+        joinedload(Band.user),
+        selectinload(Band.shows),
+        selectinload(Band.playing)
+    )
+
+
+def band_search_load_options():
+    """Returns loaders for the band search display: shows"""
+
+    return (
+        selectinload(Band.shows),
+    )
+
+
+# Conditions for each band search filter, see BandFilterSchema
+band_filters = {
+    "genre" : lambda query, genre: query.filter(Band.genre == genre),
+    "state" : lambda query, state: query.filter(Band.state == state),
+}
+
+
 # Get method for accessing all bands in database
-# returns bands from database in JSON format
+# uses paginate to read ?after=<id>&limit=N from the route
+# returns a page of bands from database in JSON format
 @bands.route("/", methods=["GET"])
 @error_handlers
-def get_bands():
-    """Returns bands from database in JSON format"""
+@replicas.read_only
+@response_cache.cached("BANDS", "USERS", "SHOWS", "PLAYING")
+@conditional_get("BANDS", "USERS", "SHOWS", "PLAYING")
+@paginate
+def get_bands(**kwargs):
+    """Returns a page of bands from database in JSON format"""
 
-    bands_list = Band.query.all()
+    page = kwargs["page"]
 
-    result = bands_schema.dump(bands_list)
+    bands_list = page.fetch(Band.query.options(*band_load_options()), \
+                            Band.id)
 
-    return jsonify(result)
+    return jsonify(page.dump(bands_schema, bands_list))
 
 
 # Get request to return the list of bands that are playing shows
-# Data to be returned is playing objects in JSON format
+# uses paginate to read ?after=<id>&limit=N from the route
+# Data to be returned is a page of playing objects in JSON format
 @bands.route("/playing", methods=["GET"])
 @error_handlers
-def get_bands_playing():
-    """Returns all playing objects from playing table"""
-    playing_list = Playing.query.all()
+@replicas.read_only
+@conditional_get("PLAYING")
+@paginate
+def get_bands_playing(**kwargs):
+    """Returns a page of playing objects from playing table"""
 
-    result = playing_schemas.dump(playing_list)
+    page = kwargs["page"]
 
-    return jsonify(result)
+    playing_list = page.fetch(Playing.query, Playing.id)
+
+    return jsonify(page.dump(playing_schemas, playing_list))
 
 
 # Get method to return a single band
@@ -54,6 +101,8 @@ def get_bands_playing():
 # Returns a band from the the band table
 @bands.route("/display/band/<int:band_id>", methods=["GET"])
 @error_handlers
+@replicas.read_only
+@conditional_get("BANDS", "USERS", "SHOWS", "PLAYING")
 @get_band_fromdb
 def get_single_band(**kwargs):
     """Returns band object from database"""
@@ -63,33 +112,34 @@ def get_single_band(**kwargs):
     return jsonify(band_schema.dump(band))
 
 
-# Get method to allow search of bands with similar genre
-# or similar states
-# Takes request from query
+# Get method to allow search of bands by genre, state or both
+# uses get_filters to validate ?genre=&state= through
+# BandFilterSchema
 # Queries bands from database and returns band objects
-# that have the same data in either genre or state fields
+# matching every given filter
 @bands.route("/display/search", methods=["GET"])
 @error_handlers
-def genre_list_bands():
+@replicas.read_only
+@response_cache.cached("BANDS", "SHOWS")
+@conditional_get("BANDS", "SHOWS")
+@get_filters(band_filter_schema, band_filters)
+def genre_list_bands(**kwargs):
     """Returns queried bands from database
     
-    Method uses requests to search for bands with
-    similar genres or states in database
+    Method uses requests to search for bands matching
+    the given genre and state in database
     """
-    band_list = []
-
-    if request.args.get("genre"):
-        band_list = Band.query.filter_by(genre=\
-                                          request.args.get("genre"))
-    elif request.args.get("state"):
-        band_list = Band.query.filter_by(state=\
-                                          request.args.get("state"))
-    else:
+    filters = kwargs["filters"]
+
+    if not filters.values:
         return jsonify({"message" :\
                          "Incorrect search parameters, \
                               please use genre or state"}),\
                               400
 
+    band_query = Band.query.options(*band_search_load_options())
+    band_list = filters.apply(band_query).order_by(Band.id)
+
     band_display = BandSchema(only=["band_name", "shows"], many=True)
 
     return jsonify(band_display.dump(band_list))
@@ -131,6 +181,9 @@ def band_creation(**kwargs):
     db.session.add(band)
     db.session.commit()
 
+    identity_cache.invalidate(user.id)
+    autocomplete_index.update("band", band.id, band.band_name)
+
     return jsonify(band_schema.dump(band))
 
 
@@ -170,6 +223,8 @@ def update_band(**kwargs):
 
     db.session.commit()
 
+    autocomplete_index.update("band", band.id, band.band_name)
+
     return jsonify(band_schema.dump(band))
 
 
@@ -200,6 +255,9 @@ def delete_band(**kwargs):
         db.session.delete(band)
         db.session.commit()
 
+    identity_cache.invalidate(band.user_id)
+    autocomplete_index.remove("band", band.id)
+
     return jsonify({"message": "band deleted"}), 200
 
 
@@ -237,9 +295,17 @@ def register_to_show(**kwargs):
                 "Sorry this show does not exist, please check id"}), \
                     404
 
+    registered = Playing.query\
+        .filter_by(band_id=band.id, show_id=show.id).first()
+    if registered:
+        return jsonify({"message" : \
+                        "Band is already playing this show"}), 400
+
     db.session.add(playing)
     db.session.commit()
 
+    invalidate_show(show.id)
+
     return jsonify(playing_schema.dump(playing))
 
 
@@ -280,4 +346,6 @@ def remove_playing(**kwargs):
     db.session.delete(playing)
     db.session.commit()
 
+    invalidate_show(playing.show_id)
+
     return jsonify({"message" : "Removed from up coming show"}), 200
\ No newline at end of file
@@ -0,0 +1,58 @@
+try:
+    from flask import Blueprint, current_app, jsonify, request
+
+    from decorators.error_decorator import error_handlers
+
+    from main import replicas
+
+    from models.band import Band
+    from models.show import Show
+    from models.venue import Venue
+
+    from schemas.band_schema import BandSchema
+    from schemas.show_schema import ShowSchema
+    from schemas.venue_schema import VenueSchema
+    from streaming import formats, stream_query
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+exports = Blueprint("exports", __name__, url_prefix="/export")
+
+
+# Query and schema each resource is exported with
+# only plain columns, so no row loads a relationship
+export_sources = {
+    "shows" : (Show, ShowSchema()),
+    "bands" : (Band, BandSchema(only=["id", "band_name", "genre", "state"])),
+    "venues" : (Venue, VenueSchema(only=["id", "venue_name", "location"])),
+}
+
+
+# Get method to export every show, band or venue
+# takes the resource from the route and ?format=ndjson, json or csv
+# streams rows in id order as they are read from the database,
+# as one JSON object per line, a single JSON array or CSV
+@exports.route("/<resource>", methods=["GET"])
+@error_handlers
+def export_resource(resource):
+    """Streams every row of a resource
+
+    rows are read EXPORT_BATCH_SIZE at a time and sent as
+    they are serialized, so the whole table is never in memory
+    """
+    if resource not in export_sources:
+        return jsonify({"message" : \
+                        "Please export shows, bands or venues"}), 404
+
+    format = request.args.get("format", "ndjson")
+    if format not in formats:
+        return jsonify({"message" : \
+                        "Incorrect format, please use ndjson, json or csv"}), 400
+
+    model, schema = export_sources[resource]
+
+    return stream_query(model.query.order_by(model.id), schema, format,
+                        current_app.config["EXPORT_BATCH_SIZE"],
+                        replicas.replica())
@@ -0,0 +1,220 @@
+try:
+    from itertools import islice
+
+    from flask import Blueprint, current_app, jsonify, request
+    from marshmallow.exceptions import ValidationError
+
+    from autocomplete import autocomplete_index
+    from decorators.error_decorator import error_handlers
+    from decorators.user_login import get_admin_user
+
+    from main import db, identity_cache
+
+    from models.band import Band
+    from models.show import Show
+    from models.show_detail import refresh_show_details
+    from models.table_version import stage_tables
+    from models.user import User
+    from models.venue import Venue
+
+    from schemas.band_schema import band_schema
+    from schemas.show_schema import show_schema
+    from schemas.venue_schema import venue_schema
+    from streaming import read_rows, undecodable
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+imports = Blueprint("imports", __name__, url_prefix="/import")
+
+
+# Model, schema, unique name column and required fields of each
+# resource that can be imported
+# bands and venues belong to an owner, shows to a band and venue
+import_sources = {
+    "bands" : (Band, band_schema, "band_name",
+               ("band_name", "genre", "state")),
+    "venues" : (Venue, venue_schema, "venue_name",
+                ("venue_name", "location")),
+    "shows" : (Show, show_schema, "show_name",
+               ("show_name", "date", "band_id", "venue_id")),
+}
+
+# Upload content types and the format they are read as
+upload_formats = {
+    "text/csv" : "csv",
+    "application/x-ndjson" : "ndjson",
+}
+
+
+def validate_row(schema, required, row):
+    """Returns the row's fields loaded through schema
+
+    raises ValidationError for invalid or missing fields
+    """
+    if row is undecodable:
+        raise ValidationError({"_schema" : ["Row is not valid UTF-8"]})
+
+    if not isinstance(row, dict):
+        raise ValidationError({"_schema" : ["Row is not an object"]})
+
+    # ids and counts in an export are the database's, not imported
+    row = {key : value for key, value in row.items() if key != "id" and \
+           not getattr(schema.fields.get(key), "dump_only", False)}
+    fields = schema.load(row)
+
+    missing = [name for name in required if fields.get(name) in (None, "")]
+    if missing:
+        raise ValidationError({name : ["Missing data for required field."] \
+                               for name in missing})
+
+    fields = {name : fields[name] for name in required}
+    for name in ("band_id", "venue_id"):
+        if name in fields:
+            try:
+                fields[name] = int(fields[name])
+            except (TypeError, ValueError):
+                raise ValidationError({name : ["Not a valid integer."]})
+
+    return fields
+
+
+def existing_ids(model, ids):
+    if not ids:
+        return set()
+
+    return set(db.session.scalars(
+        db.select(model.id).where(model.id.in_(ids))))
+
+
+def check_batch(model, name, batch, seen):
+    """Returns the errors of a batch of validated rows
+
+    names are checked against the table in one query, and against
+    earlier rows through seen, shows' band and venue ids in one
+    query each
+    """
+    column = getattr(model, name)
+    names = {fields[name] for number, fields in batch}
+    taken = set(db.session.scalars(
+        db.select(column).where(column.in_(names)))) if names else set()
+
+    bands = venues = None
+    if model is Show:
+        bands = existing_ids(Band, {fields["band_id"] for number, fields \
+                                    in batch})
+        venues = existing_ids(Venue, {fields["venue_id"] for number, fields \
+                                      in batch})
+
+    errors = {}
+    for number, fields in batch:
+        problems = {}
+        if fields[name] in taken or fields[name] in seen:
+            problems[name] = ["Already exists"]
+        if bands is not None and fields["band_id"] not in bands:
+            problems["band_id"] = ["Band does not exist"]
+        if venues is not None and fields["venue_id"] not in venues:
+            problems["venue_id"] = ["Venue does not exist"]
+
+        if problems:
+            errors[number] = problems
+        else:
+            seen.add(fields[name])
+
+    return errors
+
+
+# Post method for admins to import shows, bands or venues in bulk
+# admin only, uses get_admin_user to validate the user
+# takes the resource from the route and a CSV (text/csv) or
+# NDJSON (application/x-ndjson) body, in the format /export sends
+# bands and venues belong to ?user=<id>, the admin by default
+# rows are validated with the resource's schema as they are read,
+# checked for duplicates a batch at a time and inserted and committed
+# in batches of IMPORT_BATCH_SIZE with one multi-row insert each
+# core inserts skip the session hooks, so the table's version,
+# cached responses and imported shows' details are updated here
+# returns the number of rows imported and the errors of each
+# rejected row by line number
+@imports.route("/<resource>", methods=["POST"])
+@error_handlers
+@get_admin_user
+def import_resource(resource, **kwargs):
+    """Imports rows of a resource from the request body
+
+    valid rows are imported even when others are rejected
+    """
+    if resource not in import_sources:
+        return jsonify({"message" : \
+                        "Please import shows, bands or venues"}), 404
+
+    format = upload_formats.get(request.mimetype)
+    if format is None:
+        return jsonify({"message" : \
+                        "Please send text/csv or application/x-ndjson"}), \
+                            415
+
+    model, schema, name, required = import_sources[resource]
+    table = model.__table__
+
+    owner_id = request.args.get("user", kwargs["user"].id, type=int)
+    if model is not Show:
+        db.get_or_404(User, owner_id,
+                      description="Sorry this user does not exist")
+
+    batch_size = current_app.config["IMPORT_BATCH_SIZE"]
+    max_errors = current_app.config["IMPORT_MAX_ERRORS"]
+
+    imported = 0
+    failed = 0
+    errors = []
+    seen = set()
+
+    def reject(number, problems):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({"row" : number, "errors" : problems})
+
+    rows = read_rows(request.stream, format)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+
+        batch = []
+        for number, row in chunk:
+            try:
+                batch.append((number, validate_row(schema, required, row)))
+            except ValidationError as error:
+                reject(number, error.messages)
+
+        batch_errors = check_batch(model, name, batch, seen)
+
+        inserts = []
+        for number, fields in batch:
+            if number in batch_errors:
+                reject(number, batch_errors[number])
+                continue
+            if model is not Show:
+                fields["user_id"] = owner_id
+            inserts.append(fields)
+
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+            if model is Show:
+                names = [fields["show_name"] for fields in inserts]
+                show_ids = db.session.scalars(
+                    db.select(Show.id).where(Show.show_name.in_(names)))
+                refresh_show_details(db.session.connection(), show_ids)
+            stage_tables(db.session, {table.name})
+            db.session.commit()
+            imported += len(inserts)
+
+    if imported and model is not Show:
+        identity_cache.invalidate(owner_id)
+        autocomplete_index.expire()
+
+    return jsonify({"imported" : imported, "failed" : failed,
+                    "errors" : sorted(errors, key=lambda error: error["row"])})
@@ -0,0 +1,84 @@
+try:
+    import hmac
+
+    from flask import Blueprint, abort, current_app, jsonify, request
+
+    from decorators.error_decorator import error_handlers
+    from decorators.user_login import get_admin_user
+    from main import db, instrumentation, metrics, response_cache
+    from metrics import pool_stats
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+# Creates blueprint for internal monitoring routes
+internal = Blueprint("internal", __name__, url_prefix="/internal")
+
+
+# Get method for the response cache hit and miss counters
+# admin only, uses get_admin_user to validate the user
+# returns counters in JSON format
+@internal.route("/cache", methods=["GET"])
+@error_handlers
+@get_admin_user
+def cache_stats(**kwargs):
+    """Returns response cache hits and misses"""
+
+    return jsonify(response_cache.stats())
+
+
+# Get method for per endpoint query counts and timings
+# admin only, uses get_admin_user to validate the user
+# returns totals and averages per endpoint in JSON format
+@internal.route("/metrics", methods=["GET"])
+@error_handlers
+@get_admin_user
+def request_metrics(**kwargs):
+    """Returns request instrumentation per endpoint"""
+
+    if not instrumentation.enabled:
+        return jsonify({"message" : \
+                        "Instrumentation is not enabled"}), 404
+
+    return jsonify(instrumentation.metrics())
+
+
+# Get method for the database connection pool of this worker
+# admin only, uses get_admin_user to validate the user
+# returns the pool's size, connections in and out and overflow
+# alongside the configured limits, for sizing workers against
+# Postgres max_connections
+@internal.route("/pool", methods=["GET"])
+@error_handlers
+@get_admin_user
+def database_pool(**kwargs):
+    """Returns connection pool statistics"""
+
+    config = current_app.config
+
+    return jsonify(dict(pool_stats(db.engine.pool),
+        pool_class=type(db.engine.pool).__name__,
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        timeout=config["DB_POOL_TIMEOUT"],
+        statement_timeout_ms=config["DB_STATEMENT_TIMEOUT_MS"]))
+
+
+# Get method for Prometheus to scrape
+# scrapers cannot log in, so instead of an admin user this checks
+# METRICS_TOKEN as a bearer token
+# without a token the route only exists when METRICS_OPEN,
+# as in development and testing
+# returns every metric in the text exposition format
+@internal.route("/prometheus", methods=["GET"])
+def prometheus_metrics():
+    """Returns request, pool and hashing metrics for Prometheus"""
+
+    token = current_app.config["METRICS_TOKEN"]
+    if not token and not current_app.config["METRICS_OPEN"]:
+        abort(404)
+    if token and not hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"message" : "Invalid metrics token"}), 401
+
+    return metrics.render(), 200, \
+        {"Content-Type" : "text/plain; version=0.0.4; charset=utf-8"}
@@ -0,0 +1,79 @@
+try:
+    from flask import Blueprint, current_app, jsonify, request
+
+    from decorators.conditional import conditional_get
+    from decorators.error_decorator import error_handlers
+    from decorators.pagination import paginate_ranked
+
+    from main import replicas, response_cache
+
+    from autocomplete import autocomplete_index
+    from schemas.search_schema import search_results_schema, \
+        suggestions_schema
+    from search import search_index
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+search = Blueprint("search", __name__)
+
+
+# Get method for full text search over bands, venues and shows
+# takes the words to search for from ?q=
+# uses paginate_ranked to read ?after=<cursor>&limit=N, after being
+# the next cursor of the previous page
+# Returns a page of ranked band, venue and show matches
+@search.route("/search", methods=["GET"])
+@error_handlers
+@replicas.read_only
+@response_cache.cached("BANDS", "VENUES", "SHOWS")
+@conditional_get("BANDS", "VENUES", "SHOWS")
+@paginate_ranked
+def search_catalogue(**kwargs):
+    """Returns bands, venues and shows matching every word of q
+
+    band, show and venue names and venue locations are searched,
+    best matches first
+    """
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"message" : \
+                        "Please give words to search for with ?q="}), 400
+
+    page = kwargs["page"]
+
+    results = search_index.search(text, page.after, page.limit + 1)
+    page.has_next = len(results) > page.limit
+
+    return jsonify(page.dump_ranked(search_results_schema,
+                                    results[:page.limit]))
+
+
+# Get method for band and venue name type-ahead
+# takes the start of a word from ?prefix= and the number of
+# suggestions from ?limit=, capped at AUTOCOMPLETE_SIZE_MAX
+# answered from the in-memory autocomplete index, no query is made
+# Returns matching bands and venues in alphabetical order
+@search.route("/autocomplete", methods=["GET"])
+@error_handlers
+def autocomplete():
+    """Returns bands and venues with a word starting with prefix"""
+
+    prefix = request.args.get("prefix", "")
+    try:
+        limit = int(request.args.get("limit", \
+                    current_app.config["AUTOCOMPLETE_SIZE_DEFAULT"]))
+    except ValueError:
+        return jsonify({"message" : "Please ensure limit is a number"}), 400
+
+    if not prefix.strip() or limit < 1:
+        return jsonify({"message" : \
+                        "Please give a prefix and a limit of 1 or more"}), \
+                            400
+
+    limit = min(limit, current_app.config["AUTOCOMPLETE_SIZE_MAX"])
+
+    suggestions = autocomplete_index.suggest(prefix, limit)
+
+    return jsonify({"results" : suggestions_schema.dump(suggestions)})
@@ -1,19 +1,27 @@
 try:
-    from flask import Blueprint, jsonify, request
+    from datetime import date, timedelta
 
+    from flask import Blueprint, current_app, jsonify, request
+
+    from decorators.conditional import conditional_get
+    from decorators.date_filter import get_date_range
     from decorators.error_decorator import error_handlers
+    from decorators.filters import get_filters
+    from decorators.pagination import paginate
     from decorators.show_decorator import get_show_fromdb
     from decorators.user_login import get_user_fromdb
     
-    from main import db
+    from feed import invalidate_show
+    from main import db, replicas, response_cache
 
     from models.band import Band
     from models.show import Show
+    from models.show_detail import ShowDetail, build_details
     from models.venue import Venue
 
-    from schemas.show_schema import show_schema, shows_schema, \
-        ShowSchema
-    from schemas.venue_schema import VenueSchema
+    from schemas.show_schema import show_listing_schema, show_schema, \
+        shows_schema, ShowSchema
+    from schemas.filter_schema import show_filter_schema
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
@@ -22,81 +30,169 @@ except ImportError:
 shows = Blueprint("shows", __name__, url_prefix="/shows")
 
 
+# Conditions for each show search filter, see ShowFilterSchema
+show_filters = {
+    "venue" : lambda query, venue_id: query.filter(Show.venue_id == venue_id),
+    "band" : lambda query, band_id: query.filter(Show.band_id == band_id),
+    "genre" : lambda query, genre: query.filter(
+        Show.band.has(Band.genre == genre)),
+    "state" : lambda query, state: query.filter(
+        Show.band.has(Band.state == state)),
+    "start" : lambda query, start: query.filter(Show.date >= start),
+    "end" : lambda query, end: query.filter(Show.date <= end),
+    "min_attendees" : lambda query, count: query.filter(
+        Show.attendee_count >= count),
+    "max_attendees" : lambda query, count: query.filter(
+        Show.attendee_count <= count),
+    "order" : lambda query, order: query.order_by(Show.date, Show.id),
+}
+
+# Filters reading attendee counts, kept up to date with ATTENDING
+attendee_filters = {"ATTENDING" : ("min_attendees", "max_attendees")}
+
+
 # Get method for accessing shows in show table
-# Returns show objects as list of JSON objects
+# uses paginate to read ?after=<id>&limit=N from the route
+# uses get_date_range to read ?from=&to=&order=date from the route
+# Returns a page of show objects as list of JSON objects
 @shows.route("/", methods=["GET"])
 @error_handlers
-def get_shows():
-    """Returns shows within show table"""
+@replicas.read_only
+@response_cache.cached("SHOWS")
+@conditional_get("SHOWS")
+@paginate
+@get_date_range
+def get_shows(**kwargs):
+    """Returns a page of shows within show table
+    
+    filters shows between the from and to dates when given
+    pages by date then id when ordered by date, otherwise by id
+    """
+
+    page = kwargs["page"]
+    date_range = kwargs["date_range"]
 
-    shows_list = Show.query.all()
+    show_query = date_range.apply(Show.query, Show.date)
 
-    result = shows_schema.dump(shows_list)
+    if date_range.order_by_date:
+        shows_list = page.fetch_by(show_query, Show.date, Show.id)
+    else:
+        shows_list = page.fetch(show_query, Show.id)
 
-    return jsonify(result)
+    return jsonify(page.dump(show_listing_schema, shows_list))
 
 
 # Get method for accessing a single show
 # method takes show Id 
-# returns show including the venue it has a relationship with
+# reads the show's details, kept in SHOW_DETAILS as shows, venues,
+# bands and line ups change, with its attendee count from SHOWS
+# in one primary key lookup
+# shows bulk inserted without details have them built on the fly
+# returns show with its venue, headliner, supporting bands and
+# attendee count
 @shows.route("/display/show/<int:id>", methods=["GET"])
 @error_handlers
+@replicas.read_only
+@conditional_get("SHOWS", "VENUES", "BANDS", "PLAYING", "ATTENDING")
 def display_show(id):
-    """Returns a single show object with 
-    venue object associated with show
-    
-    queries show with route header request of id integer
-    queries venue with show.venue_id
+    """Returns a single show object with its venue, headliner,
+    supporting bands and attendee count
     """
-
-
-    show = Show.query.filter_by(id=id).first()
-    if not show:
+    row = db.session.execute(
+        db.select(Show.attendee_count, ShowDetail.detail)\
+            .outerjoin(ShowDetail, ShowDetail.show_id == Show.id)\
+                .where(Show.id == id)).first()
+    if not row:
         return jsonify({"message" : \
                         "Show does not exist"}), 400
-    venue = Venue.query.filter_by(id=show.venue_id).first()
-    if not venue:
-        return jsonify({"message" : \
-                        "Venue is not connected to show"}), 400
 
+    detail = row.detail
+    if detail is None:
+        detail = build_details(db.session.connection(), [id]).get(id)
+        if detail is None:
+            return jsonify({"message" : \
+                            "Venue is not connected to show"}), 400
 
-    show_display = ShowSchema(only=\
-                              ["id", "show_name", "date", "band_id"])
-    venue_display = VenueSchema(only=["venue_name", "location"])
-
-    return jsonify(show_display.dump(show), venue_display.dump(venue))
+    return jsonify({**detail, "attendee_count" : row.attendee_count})
 
 
-# Get route using search method to 
-# display shows with similar venue or band
-# uses requests to query show with venue_id or band_id
+# Get route using search method to display shows
+# matching any combination of filters
+# uses get_filters to validate ?venue=&band=&genre=&state=
+# &from=&to=&min_attendees=&max_attendees=&order=date
+# through ShowFilterSchema, genre and state being the band's
+# attendee counts change with ATTENDING, so only searches filtering
+# on them are invalidated by attendances
 # returns validated shows in JSON object format
 @shows.route("/display/search", methods=["GET"])
 @error_handlers
-def search_shows():
-    """Returns shows with matching venue or band ids
+@replicas.read_only
+@response_cache.cached("SHOWS", "BANDS", when=attendee_filters)
+@conditional_get("SHOWS", "BANDS", when=attendee_filters)
+@get_filters(show_filter_schema, show_filters)
+def search_shows(**kwargs):
+    """Returns shows matching every given filter
     
-    uses requests within route to query show associating id
-    with the given venue or band id
+    filters combine into a single query, at least one
+    filter besides order is required
     """
-    shows_list = []
+    filters = kwargs["filters"]
 
-    if request.args.get("venue"):
-        shows_list = Show.query.filter_by(venue_id = \
-                                          request.args.get("venue"))
-    elif request.args.get("band"):
-        shows_list = Show.query.filter_by(band_id = \
-                                          request.args.get("band"))
-    else:
+    if not set(filters.values) - {"order"}:
         return jsonify({"message" : \
-                        "Incorrect search parameters, \
-                            please use band or venue"}), 400
+                        "Incorrect search parameters, please use venue, "\
+                            "band, genre, state, from, to, min_attendees "\
+                                "or max_attendees"}), 400
+
+    shows_list = filters.apply(Show.query)
 
     shows_display = ShowSchema(only=["show_name", "date"], many=True)
 
     return jsonify(shows_display.dump(shows_list))
 
 
+# Get method for the most attended shows in a date window
+# uses get_date_range to read ?from=&to= from the route,
+# today to TRENDING_DAYS ahead when neither is given
+# takes ?limit=N, TRENDING_SIZE_DEFAULT by default
+# ranks shows on their kept attendee_count through its index,
+# attendance rows are not counted per request
+# returns the shows in JSON format, most attended first
+@shows.route("/trending", methods=["GET"])
+@error_handlers
+@replicas.read_only
+@conditional_get("SHOWS", "ATTENDING", daily=True)
+@get_date_range
+def trending_shows(**kwargs):
+    """Returns the most attended shows within the date window
+
+    ties go to the most recently added show
+    """
+    date_range = kwargs["date_range"]
+
+    if not date_range.start and not date_range.end:
+        date_range.start = date.today()
+        date_range.end = date_range.start + \
+            timedelta(days=current_app.config["TRENDING_DAYS"])
+
+    try:
+        limit = int(request.args.get("limit", \
+                    current_app.config["TRENDING_SIZE_DEFAULT"]))
+    except ValueError:
+        return jsonify({"message" : "Please ensure limit is a number"}), 400
+
+    if limit < 1:
+        return jsonify({"message" : "Please give a limit of 1 or more"}), 400
+
+    limit = min(limit, current_app.config["TRENDING_SIZE_MAX"])
+
+    shows_list = date_range.apply(Show.query, Show.date)\
+        .order_by(Show.attendee_count.desc(), Show.id.desc())\
+            .limit(limit)
+
+    return jsonify({"results" : shows_schema.dump(shows_list)})
+
+
 # Post method to allow user to create a new show
 # gets validated user from get_user_fromdb
 # uses input via show_fields to associate fields with attributes
@@ -121,13 +217,16 @@ def show_creation(**kwargs):
     show = Show()
 
     if request.args.get("venue"):
-        venue = Venue.query\
-            .filter_by(id=request.args.get("venue"))\
-                .first_or_404(description=\
-                              "Sorry this venue does not exist, \
-                                please check id")
-        
-        if venue.user_id != user.id:
+        venue_id = request.args.get("venue", type=int)
+
+        # owned venues come from the cached identity, the venue is only
+        # queried to tell a missing venue from one the user doesn't own
+        if venue_id not in user.venue_ids:
+            Venue.query\
+                .filter_by(id=request.args.get("venue"))\
+                    .first_or_404(description=\
+                                  "Sorry this venue does not exist, \
+                                    please check id")
             return jsonify({"message": \
                             "Sorry you do not have access \
                                 to this venue to create a show"}), 401
@@ -135,22 +234,25 @@ def show_creation(**kwargs):
         show.show_name = show_fields["show_name"]
         show.date = show_fields["date"]
         show.band_id = show_fields["band_id"]
-        show.venue_id = venue.id
+        show.venue_id = venue_id
     elif request.args.get("band"):
-        band = Band.query\
-            .filter_by(id=request.args.get("band"))\
-                .first_or_404(description=\
-                              "Sorry this band does not exist, \
-                              please check id")
-
-        if band.user_id != user.id:
+        band_id = request.args.get("band", type=int)
+
+        # owned bands come from the cached identity, the band is only
+        # queried to tell a missing band from one the user doesn't own
+        if band_id not in user.band_ids:
+            Band.query\
+                .filter_by(id=request.args.get("band"))\
+                    .first_or_404(description=\
+                                  "Sorry this band does not exist, \
+                                  please check id")
             return jsonify({"message": \
                             "Sorry you do not have access \
                                 to this band to create a show"}), 401
         
         show.show_name = show_fields["show_name"]
         show.date = show_fields["date"]
-        show.band_id = band.id
+        show.band_id = band_id
         show.venue_id = show_fields["venue_id"]
 
     show_exists = Show.query\
@@ -185,19 +287,21 @@ def update_show(**kwargs):
     show_fields = show_schema.load(request.json)
 
     if request.args.get("venue"):
-
-        venue = Venue.query\
-            .filter_by(id=request.args.get("venue"))\
-                .first_or_404(description=\
-                              "Sorry this venue does not exist, \
-                                please check id")
-        
-        if venue.user_id != user.id:
+        venue_id = request.args.get("venue", type=int)
+
+        # owned venues come from the cached identity, the venue is only
+        # queried to tell a missing venue from one the user doesn't own
+        if venue_id not in user.venue_ids:
+            Venue.query\
+                .filter_by(id=request.args.get("venue"))\
+                    .first_or_404(description=\
+                                  "Sorry this venue does not exist, \
+                                    please check id")
             return jsonify({"message": \
                             "Sorry you do not have access \
                                 to this venue to update a show"}), 401
 
-        if venue.id != show.venue_id:
+        if venue_id != show.venue_id:
             return jsonify({"message" : \
                             "You do not have access to this show"}), \
                                 401
@@ -205,26 +309,31 @@ def update_show(**kwargs):
         show.show_name = show_fields["show_name"]
         show.date = show_fields["date"]
         show.band_id = show_fields["band_id"]
-        show.venue_id = venue.id
+        show.venue_id = venue_id
     elif request.args.get("band"):
-        band = Band.query\
-            .filter_by(id=request.args.get("band"))\
-                .first_or_404(description="Sorry this band does \
-                              not exist, please check id")
-
-        if band.user_id != user.id:
+        band_id = request.args.get("band", type=int)
+
+        # owned bands come from the cached identity, the band is only
+        # queried to tell a missing band from one the user doesn't own
+        if band_id not in user.band_ids:
+            Band.query\
+                .filter_by(id=request.args.get("band"))\
+                    .first_or_404(description="Sorry this band does \
+                                  not exist, please check id")
             return jsonify({"message": \
                             "Sorry you do not have access to this \
                                 band to update a show"}), 401
         
         show.show_name = show_fields["show_name"]
         show.date = show_fields["date"]
-        show.band_id = band.id
+        show.band_id = band_id
         show.venue_id = show_fields["venue_id"]
     
 
     db.session.commit()
 
+    invalidate_show(show.id)
+
     return jsonify(show_schema.dump(show))
 
 
@@ -234,6 +343,8 @@ def update_show(**kwargs):
 # uses requests within route to confirm if venue or band
 # is deleting show
 # confirms venue/band have the authorized user.id to do this
+# drops the feed interests of the show's attendees, before their
+# attendances are deleted with the show
 # deletes show from shows table
 # returns JSON message show deleted with 200 code
 @shows.route("/delete/show/<int:show_id>", methods=["DELETE"])
@@ -252,35 +363,45 @@ def delete_show_venue(**kwargs):
     show = kwargs["show"]
 
     if request.args.get("venue"):
-        venue = Venue.query\
-            .filter_by(id=request.args.get("venue"))\
-                .first_or_404(description=\
-                              "Sorry this venue does not exist\
-                              , please check id")
-        if venue.user_id != user.id:
+        venue_id = request.args.get("venue", type=int)
+
+        # owned venues come from the cached identity, the venue is only
+        # queried to tell a missing venue from one the user doesn't own
+        if venue_id not in user.venue_ids:
+            Venue.query\
+                .filter_by(id=request.args.get("venue"))\
+                    .first_or_404(description=\
+                                  "Sorry this venue does not exist\
+                                  , please check id")
             return jsonify({"message" : \
                             "Sorry you do not have access \
                                 to this venue to delete the show"}), \
                                     401
-        if venue.id != show.venue_id:
+        if venue_id != show.venue_id:
             return jsonify({"message" : \
                             "Sorry venue does not have access \
                                 to the show for deletion"}), 401
     
+        invalidate_show(show.id)
         db.session.delete(show)
     elif request.args.get("band"):
-        band = Band.query\
-            .filter_by(id=request.args.get("band"))\
-                .first_or_404(description=\
-                              "Sorry band does not exist, check id")
-        if band.user_id != user.id:
+        band_id = request.args.get("band", type=int)
+
+        # owned bands come from the cached identity, the band is only
+        # queried to tell a missing band from one the user doesn't own
+        if band_id not in user.band_ids:
+            Band.query\
+                .filter_by(id=request.args.get("band"))\
+                    .first_or_404(description=\
+                                  "Sorry band does not exist, check id")
             return jsonify({"message" : \
                             "Sorry you do not have access to this band \
                                 to delete the show"}), 401
-        if band.id != show.band_id:
+        if band_id != show.band_id:
             return jsonify({"message" : \
                             "Sorry band does not have access \
                                 to show for deletion"}), 401
+        invalidate_show(show.id)
         db.session.delete(show)
     
     db.session.commit()
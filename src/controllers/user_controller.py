@@ -1,16 +1,25 @@
 try:
-    from datetime import timedelta
+    from datetime import date, timedelta
 
-    from flask import Blueprint, jsonify, request, abort
+    from flask import Blueprint, g, jsonify, request, abort
     from flask_jwt_extended import create_access_token
+    from marshmallow.exceptions import ValidationError
 
+    from decorators.conditional import conditional_get
     from decorators.error_decorator import error_handlers
+    from decorators.pagination import paginate
     from decorators.user_login import get_admin_user, get_user_fromdb
-    from main import db, bcrypt
+    from autocomplete import autocomplete_index
+    from feed import feed_query, user_bands
+    from main import db, identity_cache, interest_cache, password_pool, \
+        replicas
     from models.attending import Attending
+    from models.show import Show
+    from models.table_version import stage_tables, upserts
     from models.user import User
-    from schemas.attending_schema import attending_schema, \
-        attending_schemas
+    from schemas.attending_schema import attending_batch_schema, \
+        attending_schema, attending_schemas
+    from schemas.show_schema import shows_schema
     from schemas.user_schema import user_schema, UserSchema
 except ImportError:
     print("Error has occurred with imports"
@@ -25,24 +34,29 @@ users = Blueprint("user", __name__, url_prefix="/users")
 # to be allowed to view the list of users
 # method uses get_admin_user decorator, to validate and 
 # return valid user object
-# Method returns all user objects in JSON format
+# uses paginate to read ?after=<id>&limit=N from the route
+# Method returns a page of user objects in JSON format
 @users.route("/display_users", methods=["GET"])
 @error_handlers
 @get_admin_user
+@conditional_get("USERS")
+@paginate
 def get_users(**kwargs):
-    """Return users from database
+    """Return a page of users from database
     
     Uses get_admin_decorator to return valid admin user
     Queries users from database and serialize information 
     into json format
     """
-    users_list = User.query.all()
+    page = kwargs["page"]
+
+    users_list = page.fetch(User.query, User.id)
 
     result = UserSchema(only=\
                         ["id", "first_name", "last_name", "email"],\
                               many=True)
 
-    return jsonify(result.dump(users_list))
+    return jsonify(page.dump(result, users_list))
 
 
 # Get method for displaying single user, 
@@ -53,6 +67,7 @@ def get_users(**kwargs):
 @users.route("/display/user/<int:user_id>", methods=["GET"])
 @error_handlers
 @get_user_fromdb
+@conditional_get("USERS", "ATTENDING")
 def display_user(**kwargs):
     """Return user information in json format
     
@@ -76,20 +91,54 @@ def display_user(**kwargs):
 
 
 # Get method for displaying contents of attending table
-# Route queries attending objects from database
+# uses paginate to read ?after=<id>&limit=N from the route
+# Route queries a page of attending objects from database
 # serializes through schema and returns json format of 
 # attending table contents
 @users.route("/attending/show", methods=["GET"])
 @error_handlers
-def get_attendees():
-    """Return Attending objects from database"""
+@replicas.read_only
+@conditional_get("ATTENDING")
+@paginate
+def get_attendees(**kwargs):
+    """Return a page of Attending objects from database"""
+
+    page = kwargs["page"]
+
+    attendees_list = page.fetch(Attending.query, Attending.id)
+
+    return jsonify(page.dump(attending_schemas, attendees_list))
+
+
+# Get method for the logged in user's feed of upcoming shows
+# route utilizes get_user_fromdb to return validated user identity
+# uses paginate to read ?after=<id>&limit=N from the route
+# the user's bands are those of the shows they attend, cached
+# between requests, their genres and states widen the feed
+# returns a page of upcoming shows ordered by date in JSON format,
+# empty until the user attends a show
+@users.route("/feed", methods=["GET"])
+@error_handlers
+@replicas.read_only
+@get_user_fromdb
+@paginate
+def get_feed(**kwargs):
+    """Returns a page of upcoming shows for the user
 
+    shows by the bands of the shows they attend, or by bands
+    sharing those bands' genres or states
+    """
+    user = kwargs["user"]
+    page = kwargs["page"]
 
-    attendees_list = Attending.query.all()
+    band_ids = user_bands(user.id)
+    if not band_ids:
+        return jsonify(page.dump(shows_schema, []))
 
-    result = attending_schemas.dump(attendees_list)
+    shows_list = page.fetch_by(feed_query(band_ids, date.today()),
+                               Show.date, Show.id)
 
-    return jsonify(result)
+    return jsonify(page.dump(shows_schema, shows_list))
 
 
 # Post method to allow users to login to the api
@@ -111,15 +160,25 @@ def user_login():
 
     user = User.query.filter_by(email=user_fields["email"]).first()
 
-    if not user or not bcrypt\
+    if not user or not password_pool\
     .check_password_hash(user.password, user_fields["password"]):
         return jsonify({"message" : \
                         "email or password didn't match"}),401
+
+    # rehash with the configured cost factor if it has changed
+    # since the password was stored, while the password is at hand
+    if password_pool.needs_rehash(user.password):
+        user.password = password_pool\
+            .generate_password_hash(user_fields["password"])
+        db.session.commit()
         
     
     expiry = timedelta(days=1)
     access_token = create_access_token(identity=str(user.id),\
                                         expires_delta=expiry)
+
+    # the new token's reads follow the user's own writes
+    g.pin_user = user.id
     
     return jsonify({"user" : user.email, "token" : access_token}), 200
 
@@ -152,9 +211,8 @@ def user_register():
     user.first_name = user_fields["first_name"]
     user.last_name = user_fields["last_name"]
     user.email = user_fields["email"]
-    user.password = bcrypt\
-        .generate_password_hash(user_fields["password"])\
-            .decode("utf-8")
+    user.password = password_pool\
+        .generate_password_hash(user_fields["password"])
     user.admin = False
 
     db.session.add(user)
@@ -165,6 +223,9 @@ def user_register():
     expiry = timedelta(days=1)
     access_token = create_access_token(identity=str(user.id),\
                                         expires_delta=expiry)
+
+    # the new token's reads follow the user's own writes
+    g.pin_user = user.id
     
     return jsonify({"user" : user.email, "token" : access_token}), 200
 
@@ -172,31 +233,42 @@ def user_register():
 # Route for updating users details
 # method utilizes get_user_fromdb to return validated user object
 # Takes input via json format to assign updated details to user object
+# only the fields given are written, so the password is only
+# rehashed when a new one is sent
 # returns updated user object in JSON format
-@users.route("/update", methods=["PUT"])
+@users.route("/update", methods=["PUT", "PATCH"])
 @error_handlers
 @get_user_fromdb
 def update_user(**kwargs):
     """Updates user in database
 
     method requires user details to be updated and validated in schema
+    writes only the details given in the request
     return updated user object in JSON format
     """
 
-    user_fields = user_schema.load(request.json)
+    user_fields = user_schema.load(request.json, partial=True)
 
-    user = kwargs["user"]
-    
-    user.first_name = user_fields["first_name"]
-    user.last_name = user_fields["last_name"]
-    user.email = user_fields["email"]
-    user.password = bcrypt\
-        .generate_password_hash(user_fields["password"])\
-            .decode("utf-8")
-    user.admin = False
+    user = db.get_or_404(User, kwargs["user"].id)
+
+    if "email" in user_fields and user_fields["email"] != user.email:
+        email_used = User.query\
+            .filter_by(email=user_fields["email"]).first()
+        if email_used:
+            return jsonify({"message": \
+                            "Email is already in use"}), 401
+
+    for field in ("first_name", "last_name", "email"):
+        if field in user_fields:
+            setattr(user, field, user_fields[field])
+
+    if "password" in user_fields:
+        user.password = password_pool\
+            .generate_password_hash(user_fields["password"])
 
     db.session.commit()
 
+    identity_cache.invalidate(user.id)
 
     return jsonify(user_schema.dump(user))
 
@@ -214,20 +286,35 @@ def update_user(**kwargs):
 def delete_user(**kwargs):
     """Deletes user from database"""
 
-    user = kwargs["user"]
+    user = db.get_or_404(User, kwargs["user"].id)
 
     id = kwargs["id"]
 
     if user.id != id and not user.admin:
         return jsonify({"message" : \
                         "No access to this user"}), 401
-    elif user.admin and not user:
+
+    # their attendances are deleted with them by the database,
+    # so the shows they attended are counted down first
+    Show.query\
+        .filter(Show.id.in_(db.select(Attending.show_id)\
+                            .where(Attending.user_id == user.id)))\
+            .update({Show.attendee_count : Show.attendee_count - 1},
+                    synchronize_session=False)
+
+    if user.admin and not user:
         db.session.delete(user)
         db.session.commit()
     else:
         db.session.delete(user)
         db.session.commit()
 
+    identity_cache.invalidate(user.id)
+    interest_cache.invalidate(user.id)
+    # their bands and venues were deleted with them
+    autocomplete_index.remove("band", *kwargs["user"].band_ids)
+    autocomplete_index.remove("venue", *kwargs["user"].venue_ids)
+
     return { "message" : "user deleted" }, 200
 
 
@@ -236,7 +323,7 @@ def delete_user(**kwargs):
 # loads attending schema for serialization
 # creates Attending instance and takes input via JSON format 
 # to assign user id and show id to instance
-# stores attending instance in database
+# stores attending instance in database and counts the show up
 # returns JSON format of attending instance
 @users.route("/attending/register", methods=["POST"])
 @get_user_fromdb
@@ -248,20 +335,37 @@ def register_attendance(**kwargs):
 
     attending_fields = attending_schema.load(request.json)
 
+    show = db.get_or_404(Show, attending_fields["show_id"],
+                         description="Sorry this show does not exist")
+
+    attending = Attending.query\
+        .filter_by(user_id=user.id, show_id=attending_fields["show_id"])\
+            .first()
+    if attending:
+        return jsonify({"message" : \
+                        "You are already attending this show"}), 400
+
     attending = Attending()
 
     attending.user_id = user.id
     attending.show_id = attending_fields["show_id"]
 
+    # incremented in the database, so concurrent attendances
+    # are all counted
+    show.attendee_count = Show.attendee_count + 1
+
     db.session.add(attending)
     db.session.commit()
 
+    interest_cache.invalidate(user.id)
+
     return jsonify(attending_schema.dump(attending))
 
 
 # Delete method to allow users to remove attendance from a show
 # method takes user identity and attending id
-# removes attendance record and returns json message "attendance deleted"
+# removes attendance record and counts the show down
+# returns json message "attendance deleted"
 @users.route("/attending/remove/<int:attending_id>",\
               methods=["DELETE"])
 @get_user_fromdb
@@ -279,7 +383,108 @@ def remove_attendance(**kwargs):
                  "Sorry you do not have access to this attendance"}),\
                       401
     
+    attending.show.attendee_count = Show.attendee_count - 1
+
     db.session.delete(attending)
     db.session.commit()
 
-    return jsonify({"message" : "attendance removed"}), 200
\ No newline at end of file
+    interest_cache.invalidate(user.id)
+
+    return jsonify({"message" : "attendance removed"}), 200
+
+
+# Post method to add and remove many of a user's attendances at once
+# route utilizes get_user_fromdb to return validated user object
+# takes lists of show ids to add and remove in JSON format,
+# {"add" : [1, 2], "remove" : [3]}
+# shows are checked to exist in one query, then attendances are
+# inserted, skipping any the user already has, and deleted with
+# one statement each, all in a single commit
+# returns the status of each show id in the order given
+@users.route("/attending/batch", methods=["POST"])
+@get_user_fromdb
+@error_handlers
+def batch_attendance(**kwargs):
+    """Adds and removes attendances of the user in one commit
+
+    adding a show already attended or removing one not attended
+    changes nothing, so a batch can safely be sent again
+    """
+    user = kwargs["user"]
+
+    try:
+        batch = attending_batch_schema.load(request.json)
+    except ValidationError as error:
+        return jsonify({"message" : \
+                        "Please give lists of show ids to add and remove",
+                        "errors" : error.messages}), 400
+
+    show_ids = set(batch["add"]) | set(batch["remove"])
+    existing = set(db.session.scalars(
+        db.select(Show.id).where(Show.id.in_(show_ids))))
+    attended = set(db.session.scalars(
+        db.select(Attending.show_id)\
+            .where(Attending.user_id == user.id,
+                   Attending.show_id.in_(show_ids))))
+
+    adding = existing.intersection(batch["add"]) - attended
+    removing = existing.intersection(batch["remove"]) & attended
+
+    # rows already in the (user_id, show_id) unique index are skipped,
+    # the database reports the rows it changed where it can, so a
+    # concurrent request for the same shows is not counted twice
+    connection = db.session.connection()
+    dialect = connection.dialect
+    table = Attending.__table__
+
+    if adding:
+        insert = upserts[dialect.name](table)\
+            .on_conflict_do_nothing(index_elements=["user_id", "show_id"]) \
+                if dialect.name in upserts else table.insert()
+        insert = insert.values([{"user_id" : user.id, "show_id" : show_id} \
+                                for show_id in sorted(adding)])
+        if dialect.full_returning:
+            adding = set(connection.execute(
+                insert.returning(table.c.show_id)).scalars())
+        else:
+            connection.execute(insert)
+
+    if removing:
+        delete = table.delete()\
+            .where(table.c.user_id == user.id,
+                   table.c.show_id.in_(removing))
+        if dialect.full_returning:
+            removing = set(connection.execute(
+                delete.returning(table.c.show_id)).scalars())
+        else:
+            connection.execute(delete)
+
+    for changed, step in ((adding, 1), (removing, -1)):
+        if changed:
+            Show.query.filter(Show.id.in_(changed))\
+                .update({Show.attendee_count : Show.attendee_count + step},
+                        synchronize_session=False)
+
+    # core statements skip the session hooks, so the versions
+    # are staged here
+    if adding or removing:
+        stage_tables(db.session, {"ATTENDING"})
+    db.session.commit()
+    if adding or removing:
+        interest_cache.invalidate(user.id)
+
+    def status(show_id, done, action, unchanged):
+        if show_id not in existing:
+            return "not found"
+        return action if show_id in done else unchanged
+
+    results = [{"show_id" : show_id,
+                "status" : status(show_id, adding, "added",
+                                  "already attending")} \
+               for show_id in batch["add"]]
+    results.extend({"show_id" : show_id,
+                    "status" : status(show_id, removing, "removed",
+                                      "not attending")} \
+                   for show_id in batch["remove"])
+
+    return jsonify({"results" : results})
@@ -1,11 +1,18 @@
 try:
+    from datetime import date
+
     from flask import Blueprint, jsonify, request
+    from sqlalchemy.orm import joinedload
 
+    from decorators.conditional import conditional_get
+    from decorators.date_filter import get_date_range
     from decorators.error_decorator import error_handlers
+    from decorators.pagination import paginate
     from decorators.user_login import get_user_fromdb
     from decorators.venue_decorator import get_venue_fromdb
 
-    from main import db
+    from autocomplete import autocomplete_index
+    from main import db, identity_cache, replicas, response_cache
 
     from models.show import Show
     from models.venue import Venue
@@ -21,33 +28,59 @@ except ImportError:
 venues = Blueprint("venues", __name__, url_prefix="/venues")
 
 
+# Relationships venues_schema walks when dumping,
+# loaded in the same query as the venues
+# built on call as backrefs only exist once mappers are configured
+def venue_load_options():
+    """Returns loaders for venues_schema: user"""
+
+    return (
+        joinedload(Venue.user),
+    )
+
+
 # Get method for accessing all venues
-# returns all venues from venue table in JSON format
+# uses paginate to read ?after=<id>&limit=N from the route
+# returns a page of venues from venue table in JSON format
 @venues.route("/", methods=["GET"])
 @error_handlers
-def get_venues():
-    """Returns all venues from venue table"""
+@replicas.read_only
+@response_cache.cached("VENUES", "USERS")
+@conditional_get("VENUES", "USERS")
+@paginate
+def get_venues(**kwargs):
+    """Returns a page of venues from venue table"""
 
-    venues_list = Venue.query.all()
+    page = kwargs["page"]
 
-    result = venues_schema.dump(venues_list)
+    venues_list = page.fetch(Venue.query.options(*venue_load_options()), \
+                             Venue.id)
 
-    return jsonify(result)
+    return jsonify(page.dump(venues_schema, venues_list))
 
 
 # Get method to display one venue and its upcoming shows,
 # queries venue using route request of venue id integer
-# queries shows that has the venue id
+# queries shows that has the venue id from today onwards,
+# or between ?from=&to= when given, ordered by date
 # returns json object of venue data including upcoming shows
 @venues.route("/display/venue/<int:id>", methods=["GET"])
 @error_handlers
-def display_venue(id):
+@replicas.read_only
+@conditional_get("VENUES", "SHOWS", daily=True)
+@get_date_range
+def display_venue(id, **kwargs):
     """Returns venue and upcoming shows in JSON format
     
     queries venue with request from route header
-    queries shows using venue.id
+    queries shows using venue.id and the date range
     serializes venue and show objects through schemas
     """
+    date_range = kwargs["date_range"]
+
+    if not date_range.start:
+        date_range.start = date.today()
+
     venue = Venue.query.filter_by(id=id).first()
 
     if not venue:
@@ -56,8 +89,9 @@ def display_venue(id):
 
     venue_display = VenueSchema(only=["id", "venue_name", "location"])
 
-    upcoming_shows = Show.query\
-        .filter_by(venue_id = venue.id)
+    upcoming_shows = date_range.apply(Show.query, Show.date)\
+        .filter_by(venue_id = venue.id)\
+            .order_by(Show.date, Show.id)
     
     if not upcoming_shows:
         upcoming_shows = []
@@ -96,6 +130,9 @@ def venue_creation(**kwargs):
     db.session.add(venue)
     db.session.commit()
 
+    identity_cache.invalidate(user.id)
+    autocomplete_index.update("venue", venue.id, venue.venue_name)
+
     return jsonify(venue_schema.dump(venue))
 
 
@@ -133,6 +170,8 @@ def update_venue(**kwargs):
 
     db.session.commit()
 
+    autocomplete_index.update("venue", venue.id, venue.venue_name)
+
     return jsonify(venue_schema.dump(venue))
 
 
@@ -165,4 +204,7 @@ def delete_venue(**kwargs):
         db.session.delete(venue)
         db.session.commit()
 
+    identity_cache.invalidate(venue.user_id)
+    autocomplete_index.remove("venue", venue.id)
+
     return jsonify({"msg": "venue deleted"}), 200
\ No newline at end of file
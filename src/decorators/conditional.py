@@ -0,0 +1,66 @@
+try:
+    from datetime import date, datetime, time, timezone
+    from flask import g, make_response, request
+    from functools import wraps
+    from cache.response import request_tables
+    from models.table_version import table_versions
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Conditional GET decorator
+# takes the names of the tables a read route serializes
+# builds the ETag from their TableVersion counters and
+# Last-Modified from the latest change to any of them
+# answers If-None-Match / If-Modified-Since with a 304
+# before the route queries or serializes anything
+# daily=True also changes the ETag each day, for routes
+# whose results depend on today's date
+# when maps tables to query args, a table is only included
+# when the request has one of its args
+# responses the route marks g.stale, built from data lagging
+# TableVersion, are sent without validators
+def conditional_get(*tables, daily=False, when=None):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tables_read = request_tables(tables, when)
+            versions = table_versions(tables_read)
+
+            etag = "-".join(str(versions[table].version) \
+                            if table in versions else "0" \
+                                for table in tables_read)
+
+            changes = [row.updated_at for row in versions.values()]
+            if daily:
+                today = date.today()
+                etag += "-" + today.isoformat()
+                changes.append(datetime.combine(today, time()))
+
+            last_modified = None
+            if changes:
+                last_modified = max(changes)\
+                    .replace(microsecond=0, tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = last_modified is not None and \
+                    request.if_modified_since is not None and \
+                        last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                response = make_response(func(*args, **kwargs))
+                if response.status_code != 200 or g.get("stale"):
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,60 @@
+try:
+    from datetime import datetime
+    from flask import jsonify, request
+    from functools import wraps
+    from schemas.show_schema import date_format
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# DateRange object holds the from and to dates of a show search
+# and whether results should be ordered by date
+class DateRange:
+    def __init__(self, start, end, order_by_date):
+        self.start = start
+        self.end = end
+        self.order_by_date = order_by_date
+
+    def apply(self, query, column):
+        """Returns query filtered to rows with column between
+        start and end, both inclusive and both optional
+        """
+        if self.start:
+            query = query.filter(column >= self.start)
+        if self.end:
+            query = query.filter(column <= self.end)
+
+        return query
+
+
+# Date filter decorator reads from, to and order from the query string
+# ?from=dd/mm/yyyy&to=dd/mm/yyyy&order=date
+# returns kwargs["date_range"] = date_range as the DateRange
+# object being passed
+def get_date_range(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            start = request.args.get("from")
+            end = request.args.get("to")
+
+            if start:
+                start = datetime.strptime(start, date_format).date()
+            if end:
+                end = datetime.strptime(end, date_format).date()
+        except ValueError:
+            return jsonify({"message" : \
+                            "Please ensure from and to are dates "\
+                                "in dd/mm/yyyy format"}), 400
+
+        order = request.args.get("order")
+        if order and order != "date":
+            return jsonify({"message" : \
+                            "Incorrect order parameter, please use date"}), \
+                                400
+
+        kwargs["date_range"] = DateRange(start, end, order == "date")
+
+        return func(*args, **kwargs)
+    return wrapper
@@ -1,8 +1,10 @@
 try:
     from functools import wraps
-    from flask import jsonify
+    from flask import current_app, jsonify
     from marshmallow.exceptions import ValidationError
-    from sqlalchemy.exc import ProgrammingError, DataError
+    from sqlalchemy.exc import ProgrammingError, DataError, TimeoutError
+    from password_pool import PoolSaturated
+    from decorators.pagination import InvalidCursor
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
@@ -13,6 +15,9 @@ def error_handlers(func):
     def wrapper(*args, **kwargs):
         try:
             response = func(*args, **kwargs)
+        except InvalidCursor:
+            return jsonify({"message" : "Please ensure after is the next "
+                            "value of a previous page"}), 400
         except ValidationError:
             return jsonify({"message" : "Error with validation, ensure all fields are filled out correctly"}), 400
         except ProgrammingError:
@@ -23,6 +28,12 @@ def error_handlers(func):
             return jsonify({"message" : "Error with the data you are inputting"}), 400
         except KeyError:
             return jsonify({"message": "Missing body for request"}), 500
+        except PoolSaturated as error:
+            return jsonify({"message" : "Server is busy, please try again shortly"}), 503, \
+                {"Retry-After" : str(error.retry_after)}
+        except TimeoutError:
+            return jsonify({"message" : "Server is busy, please try again shortly"}), 503, \
+                {"Retry-After" : str(current_app.config["DB_RETRY_AFTER"])}
         return response
     return wrapper
 
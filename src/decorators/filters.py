@@ -0,0 +1,46 @@
+try:
+    from flask import jsonify, request
+    from functools import wraps
+    from marshmallow.exceptions import ValidationError
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Filters object holds the validated filters of a search
+# rules maps each filter name to a function (query, value) -> query
+# adding its condition, so filters combine into one query
+class Filters:
+    def __init__(self, values, rules):
+        self.values = values
+        self.rules = rules
+
+    def apply(self, query):
+        """Returns query with the condition of every given filter"""
+
+        for name, value in self.values.items():
+            if name in self.rules:
+                query = self.rules[name](query, value)
+
+        return query
+
+
+# Filter decorator validates the query string through schema
+# ?genre=Punk&state=VIC, any combination of the schema's fields
+# unknown or invalid parameters return a 400 with the reasons
+# returns kwargs["filters"] = filters as the Filters object being passed
+def get_filters(schema, rules):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                values = schema.load(request.args.to_dict())
+            except ValidationError as error:
+                return jsonify({"message" : "Incorrect search parameters",
+                                "errors" : error.messages}), 400
+
+            kwargs["filters"] = Filters(values, rules)
+
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
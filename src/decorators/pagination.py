@@ -0,0 +1,182 @@
+try:
+    from flask import current_app, jsonify, request
+    from functools import wraps
+    from sqlalchemy import tuple_
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Raised when a cursor does not suit the page it is used on, such as
+# an id cursor on a date ordered page
+class InvalidCursor(ValueError):
+    pass
+
+
+# Page object holds the keyset cursor and page size for a request
+# after is the last id the client has already seen
+# sort_after is that row's sort value as sent in the cursor, for
+# pages ordered by another column first, otherwise None
+# limit is the number of rows to return, capped at PAGE_SIZE_MAX
+class Page:
+    def __init__(self, after, limit, sort_after=None):
+        self.after = after
+        self.limit = limit
+        self.sort_after = sort_after
+        self.sort_key = None
+        self.has_next = False
+
+    def fetch(self, query, key):
+        """Returns one page of rows from query ordered by key
+
+        Uses key > after instead of OFFSET so the database
+        can seek straight to the page through the key's index
+        fetches one extra row to know if another page exists
+        """
+        if self.sort_after is not None:
+            raise InvalidCursor()
+
+        rows = query\
+            .filter(key > self.after)\
+                .order_by(key)\
+                    .limit(self.limit + 1)\
+                        .all()
+
+        self.has_next = len(rows) > self.limit
+
+        return rows[:self.limit]
+
+    def fetch_by(self, query, sort_key, key):
+        """Returns one page of rows from query ordered by sort_key, key
+
+        The cursor carries the last row's sort_key value with its key,
+        so the page seeks along a (sort_key, key) index and still
+        follows on when that row has since been deleted
+        raises InvalidCursor when after is set without a sort value
+        """
+        self.sort_key = sort_key
+        if self.after:
+            if self.sort_after is None:
+                raise InvalidCursor()
+            try:
+                sort_value = sort_key.type.python_type\
+                    .fromisoformat(self.sort_after)
+            except ValueError:
+                raise InvalidCursor()
+            query = query.filter(tuple_(sort_key, key) > \
+                                 tuple_(sort_value, self.after))
+
+        rows = query\
+            .order_by(sort_key, key)\
+                .limit(self.limit + 1)\
+                    .all()
+
+        self.has_next = len(rows) > self.limit
+
+        return rows[:self.limit]
+
+    def dump(self, schema, rows, key="id"):
+        """Returns serialized rows with the next cursor
+
+        the cursor is the last row's key, or sort_value:key
+        for pages fetched by fetch_by
+        """
+        next_cursor = None
+        if self.has_next and rows:
+            next_cursor = getattr(rows[-1], key)
+            if self.sort_key is not None:
+                sort_value = getattr(rows[-1], self.sort_key.key)
+                next_cursor = f"{sort_value.isoformat()}:{next_cursor}"
+
+        return {
+            "results" : schema.dump(rows),
+            "next" : next_cursor,
+            "limit" : self.limit
+        }
+
+    def dump_ranked(self, schema, rows):
+        """Returns serialized rows with the next cursor, for ranked
+        results ordered by rank, type then id
+
+        the cursor is the last row's rank:type:id
+        """
+        next_cursor = None
+        if self.has_next and rows:
+            last = rows[-1]
+            next_cursor = f"{last.rank!r}:{last.type}:{last.id}"
+
+        return {
+            "results" : schema.dump(rows),
+            "next" : next_cursor,
+            "limit" : self.limit
+        }
+
+
+def page_limit():
+    """Returns ?limit=N, falling back to PAGE_SIZE_DEFAULT
+
+    raises ValueError when it is not a number
+    """
+    return int(request.args.get("limit", \
+               current_app.config["PAGE_SIZE_DEFAULT"]))
+
+
+# Pagination decorator reads after and limit from the query string
+# ?after=<id>&limit=N, limit falls back to PAGE_SIZE_DEFAULT
+# and is capped at PAGE_SIZE_MAX from config
+# pages ordered by another column take ?after=<value>:<id>
+# returns kwargs["page"] = page as the Page object being passed
+def paginate(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            sort_after, _, after = \
+                request.args.get("after", "0").rpartition(":")
+            after = int(after)
+            limit = page_limit()
+        except ValueError:
+            return jsonify({"message" : \
+                            "Please ensure after and limit are numbers"}), \
+                                400
+
+        if after < 0 or limit < 1:
+            return jsonify({"message" : \
+                            "after must be 0 or more and limit 1 or more"}), \
+                                400
+
+        limit = min(limit, current_app.config["PAGE_SIZE_MAX"])
+
+        kwargs["page"] = Page(after, limit, sort_after or None)
+
+        return func(*args, **kwargs)
+    return wrapper
+
+
+# Pagination decorator for ranked results, such as searches
+# ?after=<rank:type:id>&limit=N, after being the next cursor of the
+# previous page, limit as in paginate
+# returns kwargs["page"] = page with after as a (rank, type, id)
+# tuple, or None on the first page
+def paginate_ranked(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        after = None
+        try:
+            limit = page_limit()
+            if request.args.get("after"):
+                rank, kind, id = request.args["after"].split(":")
+                after = (float(rank), kind, int(id))
+        except ValueError:
+            return jsonify({"message" : \
+                            "Please ensure after is a cursor from a "
+                            "previous page and limit is a number"}), 400
+
+        if limit < 1:
+            return jsonify({"message" : "limit must be 1 or more"}), 400
+
+        limit = min(limit, current_app.config["PAGE_SIZE_MAX"])
+
+        kwargs["page"] = Page(after, limit)
+
+        return func(*args, **kwargs)
+    return wrapper
@@ -2,30 +2,77 @@ try:
     from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
     from flask import jsonify
     from functools import wraps
+    from cache.identity import Identity
+    from main import db, identity_cache
+    from models.band import Band
+    from models.table_version import table_versions
     from models.user import User
+    from models.venue import Venue
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
 
 
-# Admin decorator
-# fetches admin user with the use of a JWT token
+# Tables an Identity is built from
+identity_tables = ("USERS", "BANDS", "VENUES")
+
+
+def identity_stamp():
+    """Returns the versions of identity_tables, which move whenever
+    a user, band or venue is created, changed or deleted
+    """
+    versions = table_versions(identity_tables)
+
+    return "-".join(str(versions[table].version) \
+                    if table in versions else "0" \
+                        for table in identity_tables)
+
+
+# Identity loader shared by the user decorators
 # verify_jwt_in_request ensures jwt is verfied
-# User objects are queried using id=get_jwt_identity() 
-# to get correct identity
+# looks up the identity cached for get_jwt_identity() first,
+# stamped with the versions of USERS, BANDS and VENUES read before
+# it, so a deleted user, a demoted admin or a new band or venue is
+# seen by every worker on its next request
+# on a miss queries the user and the ids of the bands and venues 
+# they own, then caches them for repeat requests
+# returns Identity object with id, admin, band_ids and venue_ids
+def load_identity(description):
+    verify_jwt_in_request()
+
+    subject = get_jwt_identity()
+
+    stamp = identity_stamp()
+    identity = identity_cache.get(subject, stamp)
+    if identity is not None:
+        return identity
+
+    user = User.query\
+        .filter_by(id=subject)\
+            .first_or_404(description=description)
+
+    band_ids = db.session.scalars(
+        db.select(Band.id).filter_by(user_id=user.id)).all()
+    venue_ids = db.session.scalars(
+        db.select(Venue.id).filter_by(user_id=user.id)).all()
+
+    identity = Identity(user.id, user.admin, band_ids, venue_ids)
+    identity_cache.set(subject, identity, stamp)
+
+    return identity
+
+
+# Admin decorator
+# fetches admin user identity with the use of a JWT token
 # checks if user is admin, if not returns error
-# returns admin user as 
-# user=kwargs["user"]
+# returns admin user identity as 
+# user=kwargs["user"], an Identity rather than a User row
+# with only id, admin, band_ids and venue_ids
 def get_admin_user(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         
-        verify_jwt_in_request()
-
-        user = User.query\
-            .filter_by(id=get_jwt_identity())\
-                .first_or_404(description=\
-                              "Error in retrieving user, \
+        user = load_identity("Error in retrieving user, \
                                 please check the token")
 
         if not user.admin:
@@ -39,23 +86,18 @@ def get_admin_user(func):
 
 
 # User decorator
-# gets user object and validates/authenticates with JWT token
-# queries user objects with id=get_jwt_identity() to locate user 
-# associated with JWT token
-# returns user object as user=kwargs["user"]
+# gets user identity and validates/authenticates with JWT token
+# returns user identity as user=kwargs["user"], an Identity
+# rather than a User row, with only id, admin, band_ids and
+# venue_ids, routes that read or change the user row itself
+# load it with db.get_or_404(User, user.id)
 def get_user_fromdb(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        
 
-        user = User.query\
-            .filter_by(id=get_jwt_identity())\
-                .first_or_404(description=\
-                              "Error in retrieving user," \
+        user = load_identity("Error in retrieving user," \
                                 "please check the token")
 
-        
         kwargs["user"] = user
 
         return func(*args, **kwargs)
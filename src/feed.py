@@ -0,0 +1,62 @@
+try:
+    from sqlalchemy import or_, select, union
+
+    from main import db, interest_cache
+    from models.attending import Attending
+    from models.band import Band
+    from models.playing import Playing
+    from models.show import Show
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+def user_bands(user_id):
+    """Returns the ids of the bands headlining or playing the shows
+    a user attends, from interest_cache when there
+
+    one query through the attending (user_id, show_id) index on a miss
+    """
+    band_ids = interest_cache.get(user_id)
+    if band_ids is not None:
+        return band_ids
+
+    attended = select(Attending.show_id)\
+        .where(Attending.user_id == user_id)
+    band_ids = set(db.session.scalars(union(
+        select(Show.band_id).where(Show.id.in_(attended)),
+        select(Playing.band_id).where(Playing.show_id.in_(attended)))))
+
+    interest_cache.set(user_id, band_ids)
+
+    return band_ids
+
+
+# Upcoming shows for a user's feed
+# shows headlined or played by one of their bands, or headlined by
+# a band sharing the genre or state of one of them
+# genres and states are read from the bands in the same query, so
+# band edits need no invalidation
+# the date condition lets the (date, id) index drive the query
+def feed_query(band_ids, start):
+    """Returns a query of the shows from start on matching band_ids"""
+
+    genres = select(Band.genre).where(Band.id.in_(band_ids))
+    states = select(Band.state).where(Band.id.in_(band_ids))
+    line_ups = select(Playing.show_id).where(Playing.band_id.in_(band_ids))
+
+    return Show.query\
+        .join(Show.band)\
+            .filter(Show.date >= start,
+                    or_(Show.band_id.in_(band_ids),
+                        Show.id.in_(line_ups),
+                        Band.genre.in_(genres),
+                        Band.state.in_(states)))
+
+
+def invalidate_show(show_id):
+    """Drops the cached interests of a show's attendees,
+    when its band or line up changes
+    """
+    interest_cache.invalidate(*db.session.scalars(
+        select(Attending.user_id).where(Attending.show_id == show_id)))
@@ -0,0 +1,181 @@
+try:
+    import logging
+    from contextlib import contextmanager
+    from threading import Lock
+    from time import perf_counter
+
+    from flask import g, has_request_context, request
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy import event
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per request timings, kept on flask.g while a request runs
+class RequestTimings:
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+
+
+def current_timings():
+    if has_request_context():
+        return g.get("timings")
+    return None
+
+
+# Context manager timing serialization for the current request
+# nested calls (schemas dumping nested schemas) only count once,
+# at the outermost call
+@contextmanager
+def serializing():
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+
+    timings.serialize_depth += 1
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize_depth -= 1
+        if not timings.serialize_depth:
+            timings.serialize_time += perf_counter() - started
+
+
+# JSON provider that counts jsonify's encoding as serialization
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with serializing():
+            return super().dumps(obj, **kwargs)
+
+
+# Opt-in request instrumentation, on when INSTRUMENTATION_ENABLED
+# counts queries and DB time through SQLAlchemy engine events,
+# serialization time through schema dumps and jsonify,
+# adds them to each response as a Server-Timing header,
+# aggregates them per endpoint for /internal/metrics
+# and logs requests past SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES
+class Instrumentation:
+    def __init__(self, app=None, db=None):
+        self.enabled = False
+        self.endpoints = {}
+        self._lock = Lock()
+        self._engines = set()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.enabled = app.config["INSTRUMENTATION_ENABLED"]
+        if not self.enabled:
+            return
+
+        self.slow_ms = app.config["SLOW_REQUEST_MS"]
+        self.slow_queries = app.config["SLOW_REQUEST_QUERIES"]
+
+        # replicas included, so reads routed to them are counted
+        with app.app_context():
+            for engine in db.engines.values():
+                self.watch(engine)
+
+        app.json = TimedJSONProvider(app)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def watch(self, engine):
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_query(conn, cursor, statement, parameters, context,
+                        executemany):
+            conn.info.setdefault("query_started", []).append(perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def finish_query(conn, cursor, statement, parameters, context,
+                         executemany):
+            elapsed = perf_counter() - conn.info["query_started"].pop()
+
+            timings = current_timings()
+            if timings is None:
+                return
+
+            timings.queries += 1
+            timings.db_time += elapsed
+            if elapsed > timings.slowest_time:
+                timings.slowest_time = elapsed
+                timings.slowest_statement = statement
+
+    def start_request(self):
+        g.timings = RequestTimings()
+
+    def finish_request(self, response):
+        timings = g.pop("timings", None)
+        if timings is None:
+            return response
+
+        total = perf_counter() - timings.started
+        endpoint = request.endpoint or "unknown"
+
+        response.headers["Server-Timing"] = ", ".join([
+            f'db;dur={timings.db_time * 1000:.2f};'
+            f'desc="{timings.queries} queries"',
+            f"serialize;dur={timings.serialize_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}"
+        ])
+
+        self.record(endpoint, total, timings)
+
+        if total * 1000 > self.slow_ms or \
+                timings.queries > self.slow_queries:
+            logger.warning(
+                "slow request %s %s: %.1f ms, %d queries, %.1f ms in db, "
+                "%.1f ms serializing, slowest query %.1f ms: %s",
+                request.method, request.path, total * 1000,
+                timings.queries, timings.db_time * 1000,
+                timings.serialize_time * 1000,
+                timings.slowest_time * 1000, timings.slowest_statement)
+
+        return response
+
+    def record(self, endpoint, total, timings):
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                "requests" : 0, "total_ms" : 0.0, "max_ms" : 0.0,
+                "queries" : 0, "db_ms" : 0.0, "serialize_ms" : 0.0,
+                "slowest_query_ms" : 0.0, "slowest_query" : None
+            })
+            stats["requests"] += 1
+            stats["total_ms"] += total * 1000
+            stats["max_ms"] = max(stats["max_ms"], total * 1000)
+            stats["queries"] += timings.queries
+            stats["db_ms"] += timings.db_time * 1000
+            stats["serialize_ms"] += timings.serialize_time * 1000
+            if timings.slowest_time * 1000 > stats["slowest_query_ms"]:
+                stats["slowest_query_ms"] = timings.slowest_time * 1000
+                stats["slowest_query"] = timings.slowest_statement
+
+    def metrics(self):
+        """Returns per endpoint totals and averages"""
+
+        with self._lock:
+            results = {}
+            for endpoint, stats in self.endpoints.items():
+                requests = stats["requests"]
+                results[endpoint] = dict(stats,
+                    avg_ms=stats["total_ms"] / requests,
+                    avg_queries=stats["queries"] / requests,
+                    avg_db_ms=stats["db_ms"] / requests,
+                    avg_serialize_ms=stats["serialize_ms"] / requests)
+            return results
@@ -4,15 +4,31 @@ try:
     from flask_jwt_extended import JWTManager
     from flask_marshmallow import Marshmallow
     from flask_sqlalchemy import SQLAlchemy
+
+    from cache.identity import IdentityCache
+    from cache.interests import InterestCache
+    from cache.response import ResponseCache
+    from cascades import enforce_foreign_keys
+    from instrumentation import Instrumentation
+    from metrics import MetricsRegistry
+    from password_pool import PasswordPool
+    from replicas import ReplicaRouter, RoutingSession
 except ImportError:
     print("Error with imports," 
           "please check modules are installed")
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_" : RoutingSession})
 ma = Marshmallow()
 bcrypt = Bcrypt()
 jwt = JWTManager()
+identity_cache = IdentityCache()
+interest_cache = InterestCache()
+response_cache = ResponseCache()
+password_pool = PasswordPool()
+instrumentation = Instrumentation()
+metrics = MetricsRegistry()
+replicas = ReplicaRouter()
 
 def create_app():
     
@@ -25,6 +41,14 @@ def create_app():
     # create the database within the app
     db.init_app(app)
 
+    # Enforce foreign keys, so deletes cascade in the database
+    with app.app_context():
+        for engine in db.engines.values():
+            enforce_foreign_keys(engine)
+
+    # Initialize opt-in query and timing instrumentation within app
+    instrumentation.init_app(app, db)
+
     # create the serialization within the app
     ma.init_app(app)
 
@@ -34,9 +58,29 @@ def create_app():
     # Initialize JWT object within app
     jwt.init_app(app)
 
+    # Initialize the logged in user identity cache within app
+    identity_cache.init_app(app)
+
+    # Initialize the per user feed interests cache within app
+    interest_cache.init_app(app)
+
+    # Initialize the public response cache within app,
+    # keyed on the versions of the tables each route reads
+    from models.table_version import table_versions
+    response_cache.init_app(app, table_versions)
+
+    # Initialize read replica routing within app
+    replicas.init_app(app, db)
+
+    # Initialize the password hashing pool within app
+    password_pool.init_app(app)
+
     # register commands into the application
     from commands import db_commands
     app.register_blueprint(db_commands)
+
+    from benchmarks import bench_commands
+    app.register_blueprint(bench_commands)
     
     # Import schemas into the application
     # This is to have all schemas registered into Marshmallow
@@ -50,4 +94,8 @@ def create_app():
     for controller in registerable_controllers:
         app.register_blueprint(controller)
 
+    # Initialize the Prometheus metrics registry within app,
+    # after the blueprints so every endpoint gets its series
+    metrics.init_app(app, db, password_pool)
+
     return app
\ No newline at end of file
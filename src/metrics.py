@@ -0,0 +1,277 @@
+try:
+    from bisect import bisect_left
+    from threading import Lock, local
+    from time import perf_counter
+    from weakref import finalize
+
+    from flask import g, request
+    from sqlalchemy.exc import TimeoutError
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Histogram bucket upper bounds, an extra +Inf bucket follows each
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+wait_buckets = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5,
+                1.0, 5.0, 10.0)
+
+
+# Metric values written by one thread
+# every series has a fixed index, so recording a request is a few
+# list increments with no lock and nothing allocated per request
+# the registry sums every live thread's shard when scraped, a
+# finished thread's shard is folded into a retired total
+class Shard:
+    def __init__(self, series):
+        self.requests = [0] * series
+        self.in_flight = [0] * series
+        self.latency = [[0] * (len(latency_buckets) + 1) \
+                        for _ in range(series)]
+        self.latency_sum = [0.0] * series
+        self.size = [[0] * (len(size_buckets) + 1) for _ in range(series)]
+        self.size_sum = [0] * series
+        self.pool_wait = [0] * (len(wait_buckets) + 1)
+        self.pool_wait_sum = [0.0]
+        self.pool_timeouts = [0]
+        self.hash_wait = [0] * (len(wait_buckets) + 1)
+        self.hash_wait_sum = [0.0]
+
+    def add(self, other):
+        """Adds other's values into this shard"""
+
+        for name, values in vars(self).items():
+            for index, value in enumerate(getattr(other, name)):
+                if isinstance(value, list):
+                    for bucket, count in enumerate(value):
+                        values[index][bucket] += count
+                else:
+                    values[index] += value
+
+
+# Held in a thread's local storage only, so it is collected when
+# the thread finishes and its shard can be retired
+class ShardHandle:
+    def __init__(self, shard):
+        self.shard = shard
+
+
+# Size and connections in use of a connection pool
+# only QueuePool keeps these, SQLite's pools report nothing
+def pool_stats(pool):
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name] = method()
+
+    return stats
+
+
+# Prometheus metrics registry
+# tracks request count, latency, in-flight requests and response size
+# per blueprint and endpoint, DB pool usage, checkout wait and
+# timeouts and password hashing queue wait, rendered in the text
+# exposition format
+# init_app must run after every blueprint is registered
+class MetricsRegistry:
+    def __init__(self, app=None, db=None, password_pool=None):
+        self._local = local()
+        self._shards = []
+        self._retired = None
+        self._lock = Lock()
+        self._pools = {}
+        if app is not None:
+            self.init_app(app, db, password_pool)
+
+    def init_app(self, app, db, password_pool):
+        # series 0 collects requests that matched no endpoint
+        endpoints = ["unmatched"] + sorted(app.view_functions)
+        self._retired = Shard(len(endpoints))
+        self.series = {endpoint : index \
+                       for index, endpoint in enumerate(endpoints)}
+        self.labels = [
+            f'blueprint="{endpoint.rpartition(".")[0]}",'
+            f'endpoint="{endpoint}"' for endpoint in endpoints
+        ]
+
+        with app.app_context():
+            for name, engine in db.engines.items():
+                self.watch_pool(engine, name or "primary")
+
+        password_pool.queue_observer = self.observe_hash_wait
+
+        app.before_request(self.start_request)
+        app.after_request(self.measure_response)
+        app.teardown_request(self.finish_request)
+
+    def shard(self):
+        try:
+            return self._local.handle.shard
+        except AttributeError:
+            shard = Shard(len(self.labels))
+            with self._lock:
+                self._shards.append(shard)
+            handle = ShardHandle(shard)
+            finalize(handle, self.retire, shard)
+            self._local.handle = handle
+            return shard
+
+    def retire(self, shard):
+        """Folds a finished thread's shard into the retired total,
+        so threads that come and go do not add up
+        """
+        with self._lock:
+            self._shards.remove(shard)
+            self._retired.add(shard)
+
+    def watch_pool(self, engine, name):
+        """Times how long each connection checkout waits on the pool,
+        its usage is reported labelled with name
+        """
+        pool = engine.pool
+        if pool in self._pools.values():
+            return
+        self._pools[name] = pool
+
+        connect = pool.connect
+
+        def timed_connect():
+            started = perf_counter()
+            try:
+                return connect()
+            except TimeoutError:
+                self.shard().pool_timeouts[0] += 1
+                raise
+            finally:
+                shard = self.shard()
+                waited = perf_counter() - started
+                shard.pool_wait[bisect_left(wait_buckets, waited)] += 1
+                shard.pool_wait_sum[0] += waited
+
+        pool.connect = timed_connect
+
+    def observe_hash_wait(self, waited):
+        shard = self.shard()
+        shard.hash_wait[bisect_left(wait_buckets, waited)] += 1
+        shard.hash_wait_sum[0] += waited
+
+    def start_request(self):
+        series = self.series.get(request.endpoint, 0)
+        self.shard().in_flight[series] += 1
+        g.metrics_series = series
+        g.metrics_started = perf_counter()
+
+    def measure_response(self, response):
+        length = response.calculate_content_length()
+        if length is not None and "metrics_series" in g:
+            shard = self.shard()
+            series = g.metrics_series
+            shard.size[series][bisect_left(size_buckets, length)] += 1
+            shard.size_sum[series] += length
+        return response
+
+    def finish_request(self, exception):
+        if "metrics_series" not in g:
+            return
+
+        elapsed = perf_counter() - g.metrics_started
+        series = g.metrics_series
+        shard = self.shard()
+        shard.in_flight[series] -= 1
+        shard.requests[series] += 1
+        shard.latency[series][bisect_left(latency_buckets, elapsed)] += 1
+        shard.latency_sum[series] += elapsed
+
+    def render(self):
+        """Returns every metric in the Prometheus text format"""
+
+        with self._lock:
+            shards = list(self._shards)
+            retired = Shard(len(self.labels))
+            retired.add(self._retired)
+            shards.append(retired)
+
+        def total(values):
+            return [sum(column) for column in zip(*values)]
+
+        requests = total(shard.requests for shard in shards)
+        in_flight = total(shard.in_flight for shard in shards)
+        latency_sum = total(shard.latency_sum for shard in shards)
+        size_sum = total(shard.size_sum for shard in shards)
+        latency = [total(shard.latency[series] for shard in shards) \
+                   for series in range(len(self.labels))]
+        size = [total(shard.size[series] for shard in shards) \
+                for series in range(len(self.labels))]
+
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, labels, buckets, counts, value_sum):
+            seen = 0
+            prefix = f"{labels}," if labels else ""
+            suffix = f"{{{labels}}}" if labels else ""
+            for bound, count in zip(buckets + ("+Inf",), counts):
+                seen += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {seen}')
+            lines.append(f"{name}_sum{suffix} {value_sum}")
+            lines.append(f"{name}_count{suffix} {seen}")
+
+        header("http_requests_total", "counter", "Requests handled")
+        for labels, value in zip(self.labels, requests):
+            if value:
+                lines.append(f"http_requests_total{{{labels}}} {value}")
+
+        header("http_requests_in_flight", "gauge",
+               "Requests being handled")
+        for labels, value in zip(self.labels, in_flight):
+            lines.append(f"http_requests_in_flight{{{labels}}} {value}")
+
+        header("http_request_duration_seconds", "histogram",
+               "Request latency")
+        for series, labels in enumerate(self.labels):
+            if requests[series]:
+                histogram("http_request_duration_seconds", labels,
+                          latency_buckets, latency[series],
+                          latency_sum[series])
+
+        header("http_response_size_bytes", "histogram",
+               "Response body size")
+        for series, labels in enumerate(self.labels):
+            if sum(size[series]):
+                histogram("http_response_size_bytes", labels,
+                          size_buckets, size[series], size_sum[series])
+
+        header("db_pool_checkout_wait_seconds", "histogram",
+               "Time waiting to check a connection out of the pool")
+        histogram("db_pool_checkout_wait_seconds", "", wait_buckets,
+                  total(shard.pool_wait for shard in shards),
+                  sum(shard.pool_wait_sum[0] for shard in shards))
+
+        header("db_pool_checkout_timeouts_total", "counter",
+               "Checkouts that gave up waiting for a connection")
+        lines.append("db_pool_checkout_timeouts_total "
+                     f"{sum(shard.pool_timeouts[0] for shard in shards)}")
+
+        header("password_hash_queue_wait_seconds", "histogram",
+               "Time password hashes wait for a pool worker")
+        histogram("password_hash_queue_wait_seconds", "", wait_buckets,
+                  total(shard.hash_wait for shard in shards),
+                  sum(shard.hash_wait_sum[0] for shard in shards))
+
+        pools = {name : pool_stats(pool) \
+                 for name, pool in self._pools.items()}
+        for stat in ("size", "checkedin", "checkedout", "overflow"):
+            values = [(name, stats[stat]) \
+                      for name, stats in pools.items() if stat in stats]
+            if values:
+                header(f"db_pool_{stat}", "gauge", f"Connection pool {stat}")
+            for name, value in values:
+                lines.append(f'db_pool_{stat}{{pool="{name}"}} {value}')
+
+        return "\n".join(lines) + "\n"
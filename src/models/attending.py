@@ -3,9 +3,17 @@ from main import db
 
 class Attending(db.Model):
     __tablename__ = "ATTENDING"
+    # a user attends a show once, the unique index also serves
+    # lookups by user_id
+    __table_args__ = (
+        db.Index("uq_attending_user_id_show_id", "user_id", "show_id",
+                 unique=True),
+    )
 
     id = db.Column(db.Integer,primary_key=True)
-    user_id = db.Column(db.Integer,db.ForeignKey("USERS.id"),
+    user_id = db.Column(db.Integer,
+                        db.ForeignKey("USERS.id", ondelete="CASCADE"),
                         nullable=False)
-    show_id = db.Column(db.Integer,db.ForeignKey("SHOWS.id"),
-                        nullable=False)
\ No newline at end of file
+    show_id = db.Column(db.Integer,
+                        db.ForeignKey("SHOWS.id", ondelete="CASCADE"),
+                        nullable=False,index=True)
\ No newline at end of file
@@ -6,22 +6,31 @@ except ImportError:
 
 class Band(db.Model):
     __tablename__ = "BANDS"
+    # (genre, state) serves searches filtering on both
+    __table_args__ = (
+        db.Index("ix_bands_genre_state", "genre", "state"),
+    )
 
     id = db.Column(db.Integer,primary_key=True)
-    band_name = db.Column(db.String(),nullable=False)
-    genre = db.Column(db.String(),nullable=False)
-    state = db.Column(db.String(),nullable=False)
-    user_id = db.Column(db.Integer,db.ForeignKey("USERS.id"),
-                        nullable=False)
+    band_name = db.Column(db.String(),nullable=False,index=True)
+    genre = db.Column(db.String(),nullable=False,index=True)
+    state = db.Column(db.String(),nullable=False,index=True)
+    user_id = db.Column(db.Integer,
+                        db.ForeignKey("USERS.id", ondelete="CASCADE"),
+                        nullable=False,index=True)
     
+    # children are deleted by the foreign keys' ON DELETE CASCADE,
+    # passive_deletes stops the ORM loading them to delete one by one
     shows = db.relationship(
         "Show",
         backref="band",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
 
     playing = db.relationship(
         "Playing",
         backref="band",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
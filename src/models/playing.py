@@ -3,10 +3,18 @@ from main import db
 
 class Playing(db.Model):
     __tablename__ = "PLAYING"
+    # a band plays a show once, the unique index also serves
+    # lookups by band_id
+    __table_args__ = (
+        db.Index("uq_playing_band_id_show_id", "band_id", "show_id",
+                 unique=True),
+    )
 
     id = db.Column(db.Integer,primary_key=True)
-    band_id = db.Column(db.Integer,db.ForeignKey("BANDS.id"),
-                     nullable=False)
-    show_id = db.Column(db.Integer,db.ForeignKey("SHOWS.id"),
-                     nullable=False)
+    band_id = db.Column(db.Integer,
+                        db.ForeignKey("BANDS.id", ondelete="CASCADE"),
+                        nullable=False)
+    show_id = db.Column(db.Integer,
+                        db.ForeignKey("SHOWS.id", ondelete="CASCADE"),
+                        nullable=False,index=True)
 
@@ -3,21 +3,44 @@ from main import db
 
 class Show(db.Model):
     __tablename__ = "SHOWS"
+    # B-tree index on (date, id) serves date range filters
+    # and keyset pages ordered by date
+    # (venue_id, date) serves a venue's shows in a date range
+    # (attendee_count, id) serves the most attended shows, read
+    # backwards until enough fall in the date window
+    __table_args__ = (
+        db.Index("ix_shows_date_id", "date", "id"),
+        db.Index("ix_shows_venue_id_date", "venue_id", "date"),
+        db.Index("ix_shows_attendee_count_id", "attendee_count", "id"),
+    )
 
     id = db.Column(db.Integer,primary_key=True)
-    show_name = db.Column(db.String(),nullable=False)
-    date = db.Column(db.String(),nullable=False)
-    band_id = db.Column(db.Integer,db.ForeignKey("BANDS.id"), nullable=False)
-    venue_id = db.Column(db.Integer,db.ForeignKey("VENUES.id"), nullable=False)
+    show_name = db.Column(db.String(),nullable=False,index=True)
+    date = db.Column(db.Date(),nullable=False)
+    band_id = db.Column(db.Integer,
+                        db.ForeignKey("BANDS.id", ondelete="CASCADE"),
+                        nullable=False,index=True)
+    venue_id = db.Column(db.Integer,
+                         db.ForeignKey("VENUES.id", ondelete="CASCADE"),
+                         nullable=False)
+    # number of ATTENDING rows for the show, kept by the
+    # attendance routes so it is never counted per request
+    # a counter, updating it changes ATTENDING's version, not SHOWS'
+    attendee_count = db.Column(db.Integer,nullable=False,default=0,
+                               server_default="0",info={"counter" : True})
     
+    # children are deleted by the foreign keys' ON DELETE CASCADE,
+    # passive_deletes stops the ORM loading them to delete one by one
     attending = db.relationship(
         "Attending",
         backref="show",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
 
     playing = db.relationship(
         "Playing",
         backref="show",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
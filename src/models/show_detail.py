@@ -0,0 +1,167 @@
+try:
+    from main import db
+    from models.band import Band
+    from models.playing import Playing
+    from models.show import Show
+    from models.user import User
+    from models.venue import Venue
+    from schemas.show_schema import date_format
+    from sqlalchemy import event, inspect, select, union
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Show page read model, one row per show holding the show, its venue,
+# headliner and supporting bands as a JSON document
+# rebuilt in the same transaction as any write to the show, its
+# venue, or a band on its bill, so the page is one primary key lookup
+# the attendee count changes with every attendance, so it is read
+# from SHOWS alongside rather than kept in the document
+class ShowDetail(db.Model):
+    __tablename__ = "SHOW_DETAILS"
+
+    show_id = db.Column(db.Integer,
+                        db.ForeignKey("SHOWS.id", ondelete="CASCADE"),
+                        primary_key=True)
+    detail = db.Column(db.JSON,nullable=False)
+
+
+# Columns of each model shown in a show's details, other changes,
+# like a show's attendee count, leave the details as they are
+detail_columns = {
+    Show : ("show_name", "date", "band_id", "venue_id"),
+    Venue : ("venue_name", "location"),
+    Band : ("band_name",),
+    Playing : ("band_id", "show_id"),
+}
+
+
+def changes_detail(instance):
+    """Returns whether a changed instance alters any show's details"""
+
+    columns = detail_columns.get(type(instance), ())
+    attrs = inspect(instance).attrs
+
+    return any(attrs[column].history.has_changes() for column in columns)
+
+
+def band_shows(band_ids):
+    """Returns a select of the shows headlined or played by band_ids"""
+
+    return union(
+        select(Show.id).where(Show.band_id.in_(band_ids)),
+        select(Playing.show_id).where(Playing.band_id.in_(band_ids)))
+
+
+def build_details(connection, show_ids):
+    """Returns the detail document of each existing show in show_ids,
+    keyed by show id
+    """
+    rows = connection.execute(
+        select(Show.id, Show.show_name, Show.date,
+               Venue.id.label("venue_id"), Venue.venue_name, Venue.location,
+               Band.id.label("band_id"), Band.band_name)\
+            .join(Venue, Venue.id == Show.venue_id)\
+                .join(Band, Band.id == Show.band_id)\
+                    .where(Show.id.in_(show_ids)))
+
+    details = {
+        row.id : {
+            "id" : row.id,
+            "show_name" : row.show_name,
+            "date" : row.date.strftime(date_format),
+            "venue" : {"id" : row.venue_id, "venue_name" : row.venue_name,
+                       "location" : row.location},
+            "headliner" : {"id" : row.band_id, "band_name" : row.band_name},
+            "supporting" : []
+        } for row in rows
+    }
+
+    line_ups = connection.execute(
+        select(Playing.show_id, Band.id, Band.band_name)\
+            .join(Band, Band.id == Playing.band_id)\
+                .where(Playing.show_id.in_(show_ids))\
+                    .order_by(Playing.id))
+    for show_id, band_id, band_name in line_ups:
+        detail = details.get(show_id)
+        if detail and band_id != detail["headliner"]["id"]:
+            detail["supporting"].append({"id" : band_id,
+                                         "band_name" : band_name})
+
+    return details
+
+
+def refresh_show_details(connection, show_ids):
+    """Rebuilds the detail rows of show_ids, dropping those of
+    shows that no longer exist
+    """
+    show_ids = set(show_ids)
+    if not show_ids:
+        return
+
+    details = build_details(connection, show_ids)
+
+    table = ShowDetail.__table__
+    connection.execute(table.delete().where(table.c.show_id.in_(show_ids)))
+    if details:
+        connection.execute(table.insert(), [
+            {"show_id" : show_id, "detail" : detail}
+            for show_id, detail in details.items()
+        ])
+
+
+# Session hook that finds the shows whose details a flush changes
+# shows, line ups, and the venues and bands on their bills,
+# deleted bands and users take their supporting slots with them
+# looked up before the flush runs, while those rows still exist
+# new shows have no id yet, so are kept until after the flush
+@event.listens_for(db.session, "before_flush")
+def collect_show_details(session, flush_context, instances):
+    connection = session.connection()
+    stale = session.info.setdefault("stale_show_details", set())
+    new_shows = session.info.setdefault("new_show_details", [])
+
+    changed = [instance for instance in session.dirty \
+               if changes_detail(instance)]
+
+    band_ids = set()
+    for instance in session.new.union(changed).union(session.deleted):
+        if isinstance(instance, Show):
+            if instance.id is None:
+                new_shows.append(instance)
+            else:
+                stale.add(instance.id)
+        elif isinstance(instance, Playing):
+            stale.add(instance.show_id)
+        elif isinstance(instance, Venue) and instance.id is not None:
+            stale.update(connection.execute(
+                select(Show.id).where(Show.venue_id == instance.id))\
+                    .scalars())
+        elif isinstance(instance, Band) and instance.id is not None:
+            band_ids.add(instance.id)
+        elif isinstance(instance, User) and instance in session.deleted:
+            band_ids.update(connection.execute(
+                select(Band.id).where(Band.user_id == instance.id))\
+                    .scalars())
+
+    if band_ids:
+        stale.update(connection.execute(band_shows(band_ids)).scalars())
+
+
+# Session hook that rebuilds the collected details once the flush
+# has written the shows, in the same transaction
+@event.listens_for(db.session, "after_flush")
+def refresh_flushed_show_details(session, flush_context):
+    stale = session.info.pop("stale_show_details", set())
+    stale.update(show.id for show in \
+                 session.info.pop("new_show_details", ()) \
+                    if show.id is not None)
+
+    refresh_show_details(session.connection(), stale)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_show_details(session):
+    session.info.pop("stale_show_details", None)
+    session.info.pop("new_show_details", None)
@@ -0,0 +1,125 @@
+try:
+    from datetime import datetime
+
+    from cascades import changed_tables
+    from flask import g
+    from main import db
+    from sqlalchemy import event
+    from sqlalchemy.dialects import postgresql, sqlite
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Inserts with ON CONFLICT clauses, for the databases that
+# support them
+upserts = {
+    "postgresql" : postgresql.insert,
+    "sqlite" : sqlite.insert,
+}
+
+
+# Change counter per table, bumped after every committed insert,
+# update or delete on that table
+# read routes build their ETag and Last-Modified from it
+class TableVersion(db.Model):
+    __tablename__ = "TABLE_VERSIONS"
+
+    table_name = db.Column(db.String(),primary_key=True)
+    version = db.Column(db.Integer,nullable=False,default=0)
+    updated_at = db.Column(db.DateTime(),nullable=False,
+                           default=datetime.utcnow)
+
+
+# Session hooks that bump TableVersion for every table with new,
+# changed or deleted rows in a transaction, including rows the
+# database deletes through ON DELETE CASCADE
+# tables are staged on each flush and bumped in their own short
+# transaction once the write commits, so a version row is locked
+# for one upsert rather than for the whole writing transaction
+# and concurrent writers to a table do not queue on it
+# the trade-off is a moment after the commit where readers see the
+# new rows under the old version, and should the process die in
+# that moment the version stays old until the table's next write
+@event.listens_for(db.session, "before_flush")
+def stage_table_versions(session, flush_context, instances):
+    stage_tables(session, changed_tables(session))
+
+
+@event.listens_for(db.session, "after_commit")
+def bump_table_versions(session):
+    tables = session.info.pop("bump_tables", None)
+    if tables:
+        with db.engine.begin() as connection:
+            bump_tables(connection, tables)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_table_versions(session):
+    session.info.pop("bump_tables", None)
+
+
+def table_versions(tables):
+    """Returns the TableVersion row of each table name in tables
+    that has one, keyed by table name
+
+    rows are read once per request and reused by every decorator
+    that asks, so they all see the same versions
+    """
+    known = g.setdefault("table_versions", {})
+    missing = [table for table in tables if table not in known]
+    if missing:
+        known.update(dict.fromkeys(missing))
+        known.update({row.table_name : row for row in db.session.execute(
+            db.select(TableVersion.table_name, TableVersion.version,
+                      TableVersion.updated_at)\
+                .where(TableVersion.table_name.in_(missing)))})
+
+    return {table : known[table] for table in tables \
+            if known[table] is not None}
+
+
+def stage_tables(session, tables):
+    """Bumps the version of each table name in tables once session
+    commits, for writes made with core statements that skip the
+    session hooks
+    """
+    tables = set(tables) - {TableVersion.__tablename__}
+    if tables:
+        session.info.setdefault("bump_tables", set()).update(tables)
+
+
+def bump_tables(connection, tables):
+    """Increments the version of each table name in tables
+    
+    rows are created for tables that do not have one yet, in one
+    upsert where the database supports it, so concurrent first
+    writes to a table do not collide on its primary key
+    """
+    versions = TableVersion.__table__
+    now = datetime.utcnow()
+
+    dialect = connection.dialect.name
+    if dialect in upserts:
+        insert = upserts[dialect](versions).values([
+            {"table_name" : table, "version" : 1, "updated_at" : now}
+            for table in sorted(tables)
+        ])
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version" : versions.c.version + 1, "updated_at" : now}))
+        return
+
+    result = connection.execute(
+        versions.update()\
+            .where(versions.c.table_name.in_(tables))\
+                .values(version=versions.c.version + 1, updated_at=now))
+
+    if result.rowcount < len(tables):
+        existing = connection.execute(
+            db.select(versions.c.table_name)\
+                .where(versions.c.table_name.in_(tables))).scalars().all()
+        connection.execute(versions.insert(), [
+            {"table_name" : table, "version" : 1, "updated_at" : now}
+            for table in tables if table not in existing
+        ])
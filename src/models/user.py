@@ -15,18 +15,23 @@ class User(db.Model):
     password = db.Column(db.String(),nullable=False)
     admin = db.Column(db.Boolean(), default=False)
 
+    # children are deleted by the foreign keys' ON DELETE CASCADE,
+    # passive_deletes stops the ORM loading them to delete one by one
     bands = db.relationship(
         "Band",
         backref="user",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     venues = db.relationship(
         "Venue",
         backref="user",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     attending = db.relationship(
         "Attending",
         backref="user",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
@@ -8,13 +8,17 @@ class Venue(db.Model):
     __tablename__ = "VENUES"
 
     id = db.Column(db.Integer,primary_key=True)
-    venue_name = db.Column(db.String(),nullable=False)
+    venue_name = db.Column(db.String(),nullable=False,index=True)
     location = db.Column(db.String(), nullable=False)
-    user_id = db.Column(db.Integer,db.ForeignKey("USERS.id"),
-                        nullable=False)
+    user_id = db.Column(db.Integer,
+                        db.ForeignKey("USERS.id", ondelete="CASCADE"),
+                        nullable=False,index=True)
     
+    # children are deleted by the foreign keys' ON DELETE CASCADE,
+    # passive_deletes stops the ORM loading them to delete one by one
     shows = db.relationship(
         "Show",
         backref="venue",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
@@ -0,0 +1,108 @@
+try:
+    import hmac
+    from concurrent.futures import ProcessPoolExecutor
+    from threading import BoundedSemaphore, Lock
+    from time import perf_counter
+
+    import bcrypt
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Raised when every worker is busy and the queue is full
+# error_handlers turns it into a 503 with a Retry-After header
+class PoolSaturated(Exception):
+    def __init__(self, retry_after):
+        super().__init__("password pool is saturated")
+        self.retry_after = retry_after
+
+
+# Hashing functions run inside the worker processes
+# they match Flask-Bcrypt so existing hashes keep working
+def hash_password(password, rounds, prefix):
+    salt = bcrypt.gensalt(rounds, prefix.encode("utf-8"))
+
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def check_password(pw_hash, password):
+    pw_hash = pw_hash.encode("utf-8")
+
+    return hmac.compare_digest(
+        bcrypt.hashpw(password.encode("utf-8"), pw_hash), pw_hash)
+
+
+# Runs func in the worker and returns its result with how long it took,
+# so the caller can tell time spent waiting for a worker from hashing
+def timed(func, *args):
+    started = perf_counter()
+    result = func(*args)
+
+    return result, perf_counter() - started
+
+
+# Password pool moves bcrypt off the request thread
+# hashes run on PASSWORD_POOL_SIZE worker processes,
+# at most PASSWORD_QUEUE_DEPTH calls may be running or waiting,
+# past that PoolSaturated is raised instead of queueing forever
+# PASSWORD_POOL_SIZE = 0 hashes inline on the request thread
+# cost factor comes from BCRYPT_LOG_ROUNDS, as with Flask-Bcrypt
+# queue_observer, when set, is called with the seconds each call
+# waited for a worker
+class PasswordPool:
+    def __init__(self, app=None):
+        self.queue_observer = None
+        self._executor = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        self.prefix = app.config.get("BCRYPT_HASH_PREFIX", "2b")
+        self.size = app.config["PASSWORD_POOL_SIZE"]
+        self.retry_after = app.config["PASSWORD_RETRY_AFTER"]
+        self._slots = BoundedSemaphore(app.config["PASSWORD_QUEUE_DEPTH"])
+
+    def _run(self, func, *args):
+        if not self.size:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated(self.retry_after)
+
+        try:
+            # created on first use so forked web workers
+            # each start their own processes
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(self.size)
+
+            submitted = perf_counter()
+            result, worked = self._executor.submit(timed, func, *args)\
+                .result()
+            if self.queue_observer is not None:
+                self.queue_observer(perf_counter() - submitted - worked)
+
+            return result
+        finally:
+            self._slots.release()
+
+    def generate_password_hash(self, password):
+        """Returns a bcrypt hash of password at the configured cost"""
+
+        return self._run(hash_password, password, self.rounds, self.prefix)
+
+    def check_password_hash(self, pw_hash, password):
+        """Returns True if password matches pw_hash"""
+
+        return self._run(check_password, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """Returns True if pw_hash was not made with the configured
+        cost factor, hashes look like $2b$12$<salt and hash>
+        """
+        rounds = int(pw_hash.split("$")[2])
+
+        return rounds != self.rounds
@@ -0,0 +1,180 @@
+try:
+    from contextlib import contextmanager
+    from functools import wraps
+    from itertools import count
+    from threading import Lock
+    from time import monotonic
+
+    from flask import g, has_request_context, request
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    from flask_jwt_extended.exceptions import JWTExtendedException
+    from flask_sqlalchemy.session import Session
+    from itsdangerous import BadSignature, TimestampSigner
+    from jwt.exceptions import PyJWTError
+    from sqlalchemy.exc import InterfaceError, OperationalError
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Postgres error code of a query cancelled by statement_timeout,
+# a slow query is not a sign the replica is down
+query_canceled = "57014"
+
+# Cookie holding a client's signed pin to the primary
+pin_cookie = "replica_pin"
+
+
+# Session sending reads to the replica chosen for the current request
+# flushes, and anything outside a replica read, use the primary
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get("replica")
+            if replica is not None:
+                return self._db.engines[replica]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+# Read replica router
+# replicas are the SQLALCHEMY_BINDS named replica_*, routes marked
+# read_only are spread over them round robin
+# a replica that fails to answer is skipped for REPLICA_RETRY_SECONDS
+# and the request is retried on the primary
+# a logged in user's reads stay on the primary for
+# REPLICA_LAG_SECONDS after each of their successful writes,
+# so they always see their own changes
+# the pin is a cookie holding the user id signed with the time it
+# was set, so any worker can check it without shared state
+# routes that create or authenticate a user, who has no token yet,
+# set g.pin_user to that user's id to pin them too
+class ReplicaRouter:
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.names = []
+        self._down = {}
+        self._turns = count()
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.db = db
+        self.lag = app.config["REPLICA_LAG_SECONDS"]
+        self.retry = app.config["REPLICA_RETRY_SECONDS"]
+        self.signer = TimestampSigner(app.config["JWT_SECRET_KEY"],
+                                      salt="replica-pin")
+        self.names = sorted(name for name in app.config["SQLALCHEMY_BINDS"] \
+                            if name.startswith("replica"))
+
+        app.after_request(self.pin_writer)
+
+    def choose(self):
+        """Returns the next healthy replica's name or None"""
+
+        now = monotonic()
+        with self._lock:
+            start = next(self._turns)
+            for turn in range(len(self.names)):
+                name = self.names[(start + turn) % len(self.names)]
+                if self._down.get(name, 0) <= now:
+                    return name
+
+        return None
+
+    def mark_down(self, name):
+        with self._lock:
+            self._down[name] = monotonic() + self.retry
+
+    def subject(self):
+        """Returns the JWT subject of the request, None when there
+        is no valid token
+        """
+        try:
+            verify_jwt_in_request(optional=True)
+        except (JWTExtendedException, PyJWTError):
+            return None
+
+        return get_jwt_identity()
+
+    def pinned(self):
+        """Returns whether the request carries a pin cookie signed
+        within the last REPLICA_LAG_SECONDS
+        """
+        pin = request.cookies.get(pin_cookie)
+        if pin is None:
+            return False
+
+        try:
+            self.signer.unsign(pin, max_age=self.lag)
+        except BadSignature:
+            return False
+
+        return True
+
+    def pin_writer(self, response):
+        if request.method in ("POST", "PUT", "PATCH", "DELETE") and \
+                response.status_code < 400 and self.names:
+            user_id = g.get("pin_user") or self.subject()
+            if user_id is not None:
+                response.set_cookie(
+                    pin_cookie, self.signer.sign(str(user_id)).decode(),
+                    max_age=self.lag, httponly=True, samesite="Lax")
+
+        return response
+
+    @contextmanager
+    def replica(self):
+        """Runs the block on a healthy replica, or the primary
+        when there is none or the user has just written
+
+        for streamed responses, which outlive read_only's wrapper
+        and cannot be retried once rows have been sent
+        """
+        if self.names and not self.pinned():
+            g.replica = self.choose()
+        try:
+            yield
+        finally:
+            g.pop("replica", None)
+
+    def read_only(self, func):
+        """Decorator running a read only route on a replica
+
+        falls back to the primary when no replica is configured or
+        healthy, or the user has just written, marking g.pinned
+        so cached responses are skipped too
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.names:
+                return func(*args, **kwargs)
+
+            if self.pinned():
+                g.pinned = True
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    g.pop("pinned", None)
+
+            name = self.choose()
+            if name is None:
+                return func(*args, **kwargs)
+
+            g.replica = name
+            try:
+                return func(*args, **kwargs)
+            except (OperationalError, InterfaceError) as error:
+                if getattr(error.orig, "pgcode", None) == query_canceled:
+                    raise
+
+                self.mark_down(name)
+                self.db.session.rollback()
+                g.pop("replica")
+
+                return func(*args, **kwargs)
+            finally:
+                g.pop("replica", None)
+        return wrapper
@@ -1,12 +1,29 @@
 from main import ma
-from marshmallow import fields
+from schemas.base_schema import BaseSchema
+from marshmallow import fields, validate, validates_schema, ValidationError
 
 
-class AttendingSchema(ma.Schema):
+class AttendingSchema(BaseSchema):
     class Meta:
         fields = ("id", "user_id", "show_id")
 
 
+# Shows a user starts or stops attending in one request
+# each list takes up to 100 show ids, a show cannot be in both
+class AttendingBatchSchema(ma.Schema):
+    add = fields.List(fields.Integer(), load_default=list,
+                      validate=validate.Length(max=100))
+    remove = fields.List(fields.Integer(), load_default=list,
+                         validate=validate.Length(max=100))
+
+    @validates_schema
+    def validate_shows(self, data, **kwargs):
+        if not data["add"] and not data["remove"]:
+            raise ValidationError("Please give show ids to add or remove")
+        if set(data["add"]) & set(data["remove"]):
+            raise ValidationError("A show cannot be added and removed")
+
 
 attending_schema = AttendingSchema()
-attending_schemas = AttendingSchema(many=True)
\ No newline at end of file
+attending_schemas = AttendingSchema(many=True)
+attending_batch_schema = AttendingBatchSchema()
@@ -1,11 +1,12 @@
 try:
     from main import ma
+    from schemas.base_schema import BaseSchema
     from marshmallow import fields
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
 
-class BandSchema(ma.Schema):
+class BandSchema(BaseSchema):
     class Meta:
         # fields to be exposed
         fields = ("id", "band_name", "genre", "state", "user", "shows", "playing")
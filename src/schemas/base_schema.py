@@ -0,0 +1,13 @@
+try:
+    from main import ma
+    from instrumentation import serializing
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Base for every schema, times dumps for request instrumentation
+class BaseSchema(ma.Schema):
+    def dump(self, obj, *, many=None):
+        with serializing():
+            return super().dump(obj, many=many)
@@ -0,0 +1,33 @@
+try:
+    from marshmallow import Schema, fields, validate
+    from schemas.show_schema import date_format
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Query string filters for band searches, every field is optional
+# and any combination of them may be given
+class BandFilterSchema(Schema):
+    genre = fields.String(validate=validate.Length(min=1))
+    state = fields.String(validate=validate.Length(min=1))
+
+
+# Query string filters for show searches
+# genre and state are those of the show's band, from and to are
+# inclusive dd/mm/yyyy dates, min_attendees and max_attendees
+# bound how many users are attending
+class ShowFilterSchema(Schema):
+    venue = fields.Integer(strict=False)
+    band = fields.Integer(strict=False)
+    genre = fields.String(validate=validate.Length(min=1))
+    state = fields.String(validate=validate.Length(min=1))
+    start = fields.Date(format=date_format, data_key="from")
+    end = fields.Date(format=date_format, data_key="to")
+    min_attendees = fields.Integer(validate=validate.Range(min=0))
+    max_attendees = fields.Integer(validate=validate.Range(min=0))
+    order = fields.String(validate=validate.OneOf(["date"]))
+
+
+band_filter_schema = BandFilterSchema()
+show_filter_schema = ShowFilterSchema()
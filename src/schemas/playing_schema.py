@@ -1,8 +1,9 @@
 from main import ma
+from schemas.base_schema import BaseSchema
 from marshmallow import fields
 
 
-class PlayingSchema(ma.Schema):
+class PlayingSchema(BaseSchema):
     class Meta:
         fields = ("id", "band_id", "show_id")
 
@@ -0,0 +1,16 @@
+from main import ma
+from schemas.base_schema import BaseSchema
+from marshmallow import fields
+
+
+class SearchResultSchema(BaseSchema):
+    class Meta:
+        # type is band, venue or show
+        fields = ("type", "id", "name", "rank")
+
+    rank = fields.Float()
+
+
+search_results_schema = SearchResultSchema(many=True)
+suggestions_schema = SearchResultSchema(only=["type", "id", "name"],
+                                        many=True)
@@ -1,18 +1,29 @@
 try:
     from main import ma
+    from schemas.base_schema import BaseSchema
     from marshmallow import fields
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
 
-class ShowSchema(ma.Schema):
+# Format show dates are read and written in, e.g. 19/12/2023
+date_format = "%d/%m/%Y"
+
+
+class ShowSchema(BaseSchema):
     class Meta:
         # fields to be exposed
-        fields = ("id", "show_name", "date", "band_id", "venue_id")
+        fields = ("id", "show_name", "date", "band_id", "venue_id",
+                  "attendee_count")
 
+    date = fields.Date(format=date_format)
+    attendee_count = fields.Integer(dump_only=True)
     band = fields.Nested("BandSchema", only=["id", "band_name"])
     venue = fields.Nested("VenueSchema", only=["id", "venue_name"])
 
 
 show_schema = ShowSchema()
-shows_schema = ShowSchema(many=True)
\ No newline at end of file
+shows_schema = ShowSchema(many=True)
+# attendances leave SHOWS' version as it is, so listings cached
+# by it leave the attendee count out
+show_listing_schema = ShowSchema(exclude=["attendee_count"], many=True)
\ No newline at end of file
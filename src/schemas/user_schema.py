@@ -1,12 +1,13 @@
 try:
     from main import ma
+    from schemas.base_schema import BaseSchema
     from marshmallow import fields
     from marshmallow.validate import Length
 except ImportError:
     print("Error has occurred with imports"
           "Please check importing from modules is correct")
 
-class UserSchema(ma.Schema):
+class UserSchema(BaseSchema):
     class Meta:
         #fields to be exposed
         fields = ("id", "first_name", "last_name", "email", "password", "admin", "attending")
@@ -1,7 +1,8 @@
 from main import ma
+from schemas.base_schema import BaseSchema
 from marshmallow import fields
 
-class VenueSchema(ma.Schema):
+class VenueSchema(BaseSchema):
     class Meta:
         # fields to be exposed
         fields = ("id", "venue_name", "location", "user")
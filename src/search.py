@@ -0,0 +1,212 @@
+try:
+    import re
+    from collections import namedtuple
+    from heapq import nsmallest
+    from math import log
+    from threading import Lock, Thread
+
+    from flask import current_app, g
+    from sqlalchemy import DDL, Float, and_, cast, event, func, literal, \
+        literal_column, or_, select, union_all
+
+    from main import db
+    from models.band import Band
+    from models.show import Show
+    from models.table_version import TableVersion
+    from models.venue import Venue
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# One search hit, type is band, venue or show
+Result = namedtuple("Result", ["type", "id", "name", "rank"])
+
+# Text each kind of result is searched by
+# Postgres uses the 'simple' configuration, words are lowercased
+# but not stemmed, which suits names
+simple = literal_column("'simple'")
+documents = {
+    "band" : (Band, Band.band_name, Band.band_name),
+    "venue" : (Venue, Venue.venue_name, Venue.venue_name\
+               .concat(literal_column("' '")).concat(Venue.location)),
+    "show" : (Show, Show.show_name, Show.show_name),
+}
+
+# GIN indexes over the same to_tsvector expressions the search
+# queries use, so Postgres answers them from the index
+# created with the tables, or by flask db create-indexes
+search_indexes = [
+    (Band.__table__, DDL(
+        'CREATE INDEX IF NOT EXISTS ix_bands_search ON "BANDS" '
+        "USING gin (to_tsvector('simple', band_name))")),
+    (Venue.__table__, DDL(
+        'CREATE INDEX IF NOT EXISTS ix_venues_search ON "VENUES" '
+        "USING gin (to_tsvector('simple', venue_name || ' ' || location))")),
+    (Show.__table__, DDL(
+        'CREATE INDEX IF NOT EXISTS ix_shows_search ON "SHOWS" '
+        "USING gin (to_tsvector('simple', show_name))")),
+]
+
+for table, ddl in search_indexes:
+    event.listen(table, "after_create", ddl.execute_if(dialect="postgresql"))
+
+
+def words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def order(result):
+    """Returns the sort key of a result, best rank first"""
+
+    return (-result.rank, result.type, result.id)
+
+
+# Full text search over band, venue and show names
+# Postgres matches plainto_tsquery against the GIN indexed
+# to_tsvector of each table and ranks with ts_rank, shorter
+# documents ranking higher
+# pages seek past the previous page's (rank, type, id) in each
+# table, so each only ranks its own matches down to one page
+# other databases use an in-process inverted index from each word
+# to the documents containing it, built on first use, then rebuilt
+# on a background thread when TableVersion shows BANDS, VENUES or
+# SHOWS changed, searches meanwhile use the previous index and mark
+# g.stale so their responses are not cached
+class SearchIndex:
+    tables = ("BANDS", "VENUES", "SHOWS")
+
+    def __init__(self):
+        self.versions = None
+        # documents and postings, swapped together on a rebuild
+        self.index = ([], {})
+        self.rebuilding = False
+        self._lock = Lock()
+
+    def search(self, text, after, limit):
+        """Returns up to limit results following after, the
+        (rank, type, id) of the last result seen or None,
+        ordered by rank then type and id
+        """
+        if db.engine.dialect.name == "postgresql":
+            return self.search_postgres(text, after, limit)
+
+        return self.search_fallback(text, after, limit)
+
+    def search_postgres(self, text, after, limit):
+        query = func.plainto_tsquery(simple, text)
+
+        selects = []
+        for kind, (model, name, document) in documents.items():
+            vector = func.to_tsvector(simple, document)
+            # double precision, so the rank in a cursor compares equal
+            rank = cast(func.ts_rank(vector, query, 1), Float(53))
+            branch = select(literal(kind).label("type"),
+                            model.id.label("id"), name.label("name"),
+                            rank.label("rank"))\
+                .where(vector.op("@@")(query))
+
+            if after is not None:
+                after_rank, after_kind, after_id = after
+                if kind < after_kind:
+                    branch = branch.where(rank < after_rank)
+                elif kind > after_kind:
+                    branch = branch.where(rank <= after_rank)
+                else:
+                    branch = branch.where(or_(
+                        rank < after_rank,
+                        and_(rank == after_rank, model.id > after_id)))
+
+            selects.append(branch.order_by(rank.desc(), model.id)\
+                               .limit(limit))
+
+        results = union_all(*selects).subquery()
+        rows = db.session.execute(
+            select(results)\
+                .order_by(results.c.rank.desc(), results.c.type,
+                          results.c.id)\
+                    .limit(limit)).all()
+
+        return [Result(*row) for row in rows]
+
+    def search_fallback(self, text, after, limit):
+        terms = set(words(text))
+        if not terms:
+            return []
+
+        if not self.refresh():
+            g.stale = True
+        indexed, postings = self.index
+
+        postings = sorted((postings.get(term, ()) for term in terms),
+                          key=len)
+        matches = (indexed[number] for number in \
+                   set(postings[0]).intersection(*postings[1:]))
+        if after is not None:
+            after_rank, after_kind, after_id = after
+            cursor = (-after_rank, after_kind, after_id)
+            matches = (result for result in matches \
+                       if order(result) > cursor)
+
+        return nsmallest(limit, matches, key=order)
+
+    def table_versions(self):
+        rows = db.session.execute(
+            db.select(TableVersion.table_name, TableVersion.version)\
+                .where(TableVersion.table_name.in_(self.tables))).all()
+
+        return sorted(tuple(row) for row in rows)
+
+    def refresh(self):
+        """Builds the fallback index on first use, and starts a
+        rebuild in the background when its tables have changed
+
+        returns whether the index is up to date
+        """
+        versions = self.table_versions()
+        if versions == self.versions:
+            return True
+
+        with self._lock:
+            if versions == self.versions:
+                return True
+
+            if self.versions is None:
+                self.build(versions)
+                return True
+
+            if not self.rebuilding:
+                self.rebuilding = True
+                Thread(target=self.rebuild,
+                       args=(current_app._get_current_object(),),
+                       daemon=True).start()
+
+        return False
+
+    def rebuild(self, app):
+        try:
+            with app.app_context():
+                self.build(self.table_versions())
+        finally:
+            self.rebuilding = False
+
+    def build(self, versions):
+        """Reads every band, venue and show into a new index"""
+
+        indexed = []
+        postings = {}
+        for kind, (model, name, document) in documents.items():
+            for id, title, text in db.session.execute(
+                    db.select(model.id, name, document)):
+                terms = words(text)
+                # same length normalisation as ts_rank's 1
+                rank = 1 / (1 + log(max(len(terms), 1)))
+                for term in set(terms):
+                    postings.setdefault(term, []).append(len(indexed))
+                indexed.append(Result(kind, id, title, rank))
+
+        self.index = (indexed, postings)
+        self.versions = versions
+
+
+search_index = SearchIndex()
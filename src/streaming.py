@@ -0,0 +1,138 @@
+try:
+    import csv
+    import io
+    import json
+    import re
+    from itertools import islice
+
+    from flask import Response, current_app, stream_with_context
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Response formats a stream can be sent in
+formats = {
+    "ndjson" : "application/x-ndjson",
+    "json" : "application/json",
+    "csv" : "text/csv",
+}
+
+
+def csv_lines(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns)
+    writer.writerows(rows)
+
+    return buffer.getvalue()
+
+
+def stream_rows(rows, schema, format, batch_size):
+    """Yields rows serialized batch_size at a time
+
+    ndjson sends one JSON object per line, json a single array,
+    csv a header line then a line per row
+    """
+    dumps = current_app.json.dumps
+    rows = iter(rows)
+    columns = list(schema.dump_fields)
+
+    if format == "json":
+        yield "["
+    elif format == "csv":
+        yield ",".join(columns) + "\r\n"
+
+    separator = ""
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        if format == "csv":
+            yield csv_lines(schema.dump(batch, many=True), columns)
+            continue
+
+        objects = [dumps(data) for data in schema.dump(batch, many=True)]
+        if format == "ndjson":
+            yield "\n".join(objects) + "\n"
+        else:
+            yield separator + ",".join(objects)
+            separator = ","
+
+    if format == "json":
+        yield "]"
+
+
+# Streams a query as a chunked response
+# rows are fetched batch_size at a time through yield_per, which
+# uses a server side cursor on Postgres, and each batch is serialized
+# and sent before the next is read, so worker memory stays flat
+# however large the table
+# context is a context manager the query runs inside, e.g. a replica
+def stream_query(query, schema, format, batch_size, context):
+    def generate():
+        with context:
+            yield from stream_rows(query.yield_per(batch_size), schema,
+                                   format, batch_size)
+
+    return Response(stream_with_context(generate()),
+                    mimetype=formats[format])
+
+
+# Row read_rows yields for a line that is not UTF-8 text
+undecodable = object()
+
+
+def decoded_lines(stream, bad):
+    """Yields each line of a binary stream as text, lines end at
+    a newline, a carriage return or both
+
+    lines that are not UTF-8 are decoded with replacement characters
+    and their line numbers added to bad
+    """
+    lines = (part for line in stream \
+             for part in re.split(rb"(?<=\r)(?!\n)", line) if part)
+    for number, line in enumerate(lines, start=1):
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            bad.add(number)
+            yield line.decode("utf-8", errors="replace")
+
+
+def read_rows(stream, format):
+    """Yields (line number, row) for each row of an uploaded
+    CSV or NDJSON stream, reading it a line at a time
+
+    a line that is not valid JSON yields (line number, None),
+    a row with a line that is not UTF-8 (line number, undecodable)
+    """
+    bad = set()
+    lines = decoded_lines(stream, bad)
+
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        last = reader.line_num
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error:
+                row = None
+            if bad.intersection(range(last + 1, reader.line_num + 1)):
+                row = undecodable
+            last = reader.line_num
+            yield reader.line_num, row
+
+    for number, line in enumerate(lines, start=1):
+        if number in bad:
+            yield number, undecodable
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row
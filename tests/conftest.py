@@ -0,0 +1,80 @@
+import os
+import sys
+
+# the app reads its config from the environment when first imported
+os.environ["FLASK_ENV"] = "testing"
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "testing")
+os.environ.pop("REPLICA_DATABASE_URLS", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+try:
+    import pytest
+    from sqlalchemy import event
+
+    from main import create_app, db, identity_cache, interest_cache, \
+        response_cache
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Empty tables and caches for each test
+# requests push their own app context, tests push one to use db
+# directly, so no request shares a session or g with the test
+@pytest.fixture
+def database(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    for cache in (identity_cache, interest_cache, response_cache):
+        cache.backend.clear()
+
+    return db
+
+
+# Runs flask db seed-bulk with the given row counts,
+# seed(users=1, bands=1) passes --users 1 --bands 1
+@pytest.fixture
+def seed(app, database):
+    runner = app.test_cli_runner()
+
+    def seed_bulk(**counts):
+        args = ["db", "seed-bulk"]
+        for name, count in counts.items():
+            args += [f"--{name.replace('_', '-')}", str(count)]
+
+        result = runner.invoke(args=args)
+        assert "bulk seed complete" in result.output, result.output
+
+    return seed_bulk
+
+
+# Counts the statements sent through engine while a block runs
+# with QueryCounter(db.engine) as statements: ... len(statements)
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self.record)
+        return self.statements
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self.record)
+
+    def record(self, connection, cursor, statement, *args):
+        self.statements.append(statement)
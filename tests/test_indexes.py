@@ -0,0 +1,23 @@
+try:
+    from commands import lookup_plans, scans_table
+    from main import db
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Every lookup the controllers make must be answered from an index
+# on a seeded dataset, not by reading the whole table
+def test_controller_lookups_use_indexes(app, seed):
+    seed(users=500, bands=200, venues=50, shows=1000, attending=5000,
+         playing=2000)
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            plans = lookup_plans(connection)
+
+    scans = {name : plan for name, plan in plans.items() \
+             if scans_table(plan)}
+
+    assert plans
+    assert scans == {}
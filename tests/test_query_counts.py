@@ -0,0 +1,78 @@
+try:
+    import pytest
+
+    from conftest import QueryCounter
+    from main import db
+    from models.band import Band
+    from models.user import User
+except ImportError:
+    print("Error has occurred with imports"
+          "Please check importing from modules is correct")
+
+
+# Rows seed-bulk generates for the small and the large dataset
+one_of_each = {"users" : 1, "bands" : 1, "venues" : 1, "shows" : 1,
+               "attending" : 1, "playing" : 1}
+many_of_each = {"users" : 40, "bands" : 40, "venues" : 40, "shows" : 40,
+                "attending" : 120, "playing" : 80}
+
+# Listing and search routes, the state filter is the first band's
+listings = [
+    "/bands/",
+    "/bands/playing",
+    "/bands/display/search?state={state}",
+    "/venues/",
+    "/shows/",
+    "/shows/?order=date",
+    "/shows/display/search?state={state}",
+    "/users/attending/show",
+    "/users/display_users",
+]
+
+
+def admin_headers(app, client):
+    """Makes the first user an admin and returns their auth header,
+    bulk users share the password password123
+    """
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.admin = True
+        db.session.commit()
+        email = user.email
+
+    response = client.post("/users/login", json={
+        "email" : email, "password" : "password123"})
+
+    return {"Authorization" : f"Bearer {response.json['token']}"}
+
+
+def queries_for(app, client, url, headers):
+    """Returns how many statements one GET of url sends"""
+
+    with app.app_context():
+        engine = db.engine
+
+    with QueryCounter(engine) as statements:
+        response = client.get(url, headers=headers)
+
+    assert response.status_code == 200, response.json
+    assert response.headers.get("X-Cache") != "HIT"
+
+    return len(statements)
+
+
+# Each listing must send as many queries for one row as for a
+# full page, so serializing relationships never adds a query per row
+@pytest.mark.parametrize("listing", listings)
+def test_listing_queries_do_not_grow_with_rows(app, client, seed, listing):
+    seed(**one_of_each)
+    headers = admin_headers(app, client)
+    with app.app_context():
+        url = listing.format(state=db.session.get(Band, 1).state)
+
+    one_row = queries_for(app, client, url, headers)
+
+    seed(**many_of_each)
+    many_rows = queries_for(app, client, url, headers)
+
+    assert one_row == many_rows